@@ -0,0 +1,68 @@
+"""Benchmark de los índices de x_dedup: memoria y velocidad a 1M y 10M claves.
+
+Cada combinación corre en un subproceso para medir el pico de RSS propio.
+"dict" reproduce el índice original (permalink completo -> fila).
+
+    python bench_dedup.py --sizes 1000000 10000000
+"""
+import argparse, os, resource, subprocess, sys, tempfile, time
+
+from x_dedup import make_dedup_index, row_key
+
+KINDS = ["dict", "ids", "sqlite", "bloom"]
+BASE_ID = 1928801685054345407
+
+def fake_row(i):
+    tid = BASE_ID + i
+    return {
+        "display_name": "Usuario", "handle": "@usuario", "text": "x" * 200,
+        "timestamp": "2025-05-31T13:12:11.000Z",
+        "permalink": f"https://x.com/usuario/status/{tid}",
+        "replies": 0, "retweets": 0, "likes": 0,
+    }
+
+def run_one(kind, n):
+    tmp = None
+    kw = {}
+    if kind == "sqlite":
+        fd, tmp = tempfile.mkstemp(suffix=".sqlite")
+        os.close(fd)
+        kw = {"path": tmp}
+    elif kind == "bloom":
+        kw = {"capacity": n}
+    index = make_dedup_index(kind, **kw)
+    rss0 = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    t0 = time.perf_counter()
+    for i in range(n):
+        row = fake_row(i)
+        if kind == "dict":
+            index[row["permalink"]] = row
+        else:
+            index.add(row_key(row))
+    dt = time.perf_counter() - t0
+    rss1 = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if hasattr(index, "close"):
+        index.close()
+    if tmp:
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(tmp + suffix):
+                os.remove(tmp + suffix)
+    # ru_maxrss está en KB en Linux
+    print(f"{kind:>6} n={n:>10,}: {n / dt:>12,.0f} claves/s | "
+          f"+{(rss1 - rss0) / 1024:>8.1f} MB RSS")
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", type=int, nargs="+", default=[1_000_000, 10_000_000])
+    ap.add_argument("--kinds", nargs="+", default=KINDS)
+    ap.add_argument("--one", nargs=2, metavar=("KIND", "N"), help=argparse.SUPPRESS)
+    args = ap.parse_args()
+    if args.one:
+        run_one(args.one[0], int(args.one[1]))
+        return
+    for n in args.sizes:
+        for kind in args.kinds:
+            subprocess.run([sys.executable, __file__, "--one", kind, str(n)], check=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""Benchmark de extracción: tweets parseados por segundo, modo "js" vs "dom".
+
+Usa un volcado guardado de la búsqueda (debug_x_search_source.html, el que
+go_to_search escribe cuando falla) cargado en Chrome headless sin red.
+Además del ritmo, reporta el coste por tweet y qué fracción de tweets trae
+cada campo extra (vistas, enlaces, medios, cita, respuesta), para vigilar
+que el registro completo no encarezca la extracción.
+
+Con --timeline se mide también el parser del JSON SearchTimeline sobre una
+grabación de x_replay (timeline_*.json), sin navegador.
+
+    python bench_extraccion.py debug_x_search_source.html --repeats 20
+    python bench_extraccion.py --timeline recordings/paro
+"""
+import argparse, glob, json, os, re, tempfile, time
+
+from x_crapy_json import (
+    build_driver, extract_visible_tweets_js, extract_visible_tweets_dom
+)
+from x_replay import OFFLINE_ARGS
+from x_timeline import parse_search_timeline
+
+MODES = {
+    "js": extract_visible_tweets_js,
+    "dom": extract_visible_tweets_dom,
+}
+EXTRA_FIELDS = ["views", "urls", "media", "quoted_id", "reply_to"]
+# Como PAGE_TEMPLATE de x_replay: los href relativos ("/handle/status/…") se
+# resuelven contra x.com y no contra file://
+BASE_TAG     = '<base href="https://x.com/">'
+
+def load_fixture(driver, html_path):
+    # Quita los <script> de X: sin red solo ensuciarían o vaciarían el DOM
+    with open(html_path, "r", encoding="utf-8") as f:
+        html = f.read()
+    html = re.sub(r"<script\b.*?</script>", "", html, flags=re.S | re.I)
+    html = re.sub(r"<base\b[^>]*>", "", html, flags=re.I)
+    html, n = re.subn(r"<head\b[^>]*>", lambda m: m.group(0) + BASE_TAG, html, count=1, flags=re.I)
+    if not n:
+        html = BASE_TAG + html
+    fd, tmp = tempfile.mkstemp(suffix=".html")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        f.write(html)
+    driver.get("file://" + os.path.abspath(tmp))
+    return tmp
+
+def bench(driver, fn, repeats):
+    n = 0
+    t0 = time.perf_counter()
+    for _ in range(repeats):
+        n += len(fn(driver))
+    dt = time.perf_counter() - t0
+    return n, dt
+
+def coverage(rows):
+    """Fracción de tweets con cada campo extra presente (no vacío)."""
+    if not rows:
+        return {}
+    return {f: sum(1 for r in rows if r.get(f) not in (None, [], "")) / len(rows)
+            for f in EXTRA_FIELDS}
+
+def report(name, n, dt, rows):
+    rate = n / dt if dt else 0.0
+    per = 1000 * dt / n if n else 0.0
+    cov = "  ".join(f"{k} {v:.0%}" for k, v in coverage(rows).items())
+    print(f"{name:>8}: {n} tweets en {dt:.3f}s -> {rate:,.1f} tweets/s ({per:.3f} ms/tweet)  {cov}")
+
+def bench_timeline(directory, repeats):
+    payloads = []
+    for path in sorted(glob.glob(os.path.join(directory, "timeline_*.json"))):
+        with open(path, "r", encoding="utf-8") as f:
+            payloads.append(json.load(f))
+    rows = [r for p in payloads for r in parse_search_timeline(p)[0]]
+    t0 = time.perf_counter()
+    n = 0
+    for _ in range(repeats):
+        for p in payloads:
+            n += len(parse_search_timeline(p)[0])
+    return n, time.perf_counter() - t0, rows
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("html", nargs="?", default="debug_x_search_source.html")
+    ap.add_argument("--repeats", type=int, default=10)
+    ap.add_argument("--timeline", help="carpeta de x_replay con timeline_*.json")
+    args = ap.parse_args()
+
+    if args.timeline:
+        n, dt, rows = bench_timeline(args.timeline, args.repeats)
+        report("network", n, dt, rows)
+        if not os.path.exists(args.html):
+            return
+
+    # sin red (como x_replay): con <base> a x.com, CSS e imágenes irían a internet
+    driver = build_driver(headless=True, profile_dir=False, block_media=False,
+                          extra_args=OFFLINE_ARGS)
+    tmp = None
+    try:
+        tmp = load_fixture(driver, args.html)
+        for name, fn in MODES.items():
+            rows = fn(driver)  # calentamiento
+            n, dt = bench(driver, fn, args.repeats)
+            report(name, n, dt, rows)
+    finally:
+        driver.quit()
+        if tmp:
+            os.remove(tmp)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Benchmark del motor de tendencias contra el script original.
+
+- original: .apply(split) + explode + groupby sobre todo el dataset.
+- nuevo: hashtag_counts (findall + factorize) sobre todo el dataset.
+- incremental: TrendStore.ingest de un lote nuevo sobre tablas ya construidas.
+
+    python bench_trends.py --n 1000000 --batch 10000
+"""
+import argparse, tempfile, time
+
+import numpy as np
+import pandas as pd
+
+from narrativa_emergente import hashtag_counts, TrendStore
+from x_parquet import TZ_EC
+
+TAGS = [f"#tag{i}" for i in range(2000)] + ["#ParoNacional", "#Ecuador", "#FFAA"]
+
+def synthetic(n, seed=0, start="2025-05-01"):
+    rng = np.random.default_rng(seed)
+    words = np.array(["paro", "nacional", "ecuador", "gobierno", "calle", "hoy"])
+    w, tags, k = rng.choice(words, (n, 8)), rng.choice(TAGS, (n, 3)), rng.integers(0, 4, n)
+    texts = [" ".join(w[i]) + " " + " ".join(tags[i, :k[i]]) for i in range(n)]
+    ts = pd.Timestamp(start, tz=TZ_EC) + pd.to_timedelta(rng.integers(0, 30 * 86400, n), unit="s")
+    # IDs distintos por semilla: TrendStore no cuenta dos veces un tweet_id
+    return pd.DataFrame({"tweet_id": np.arange(n) + seed * 10**9, "text": texts, "ts_ec": ts})
+
+def original(df):
+    def extract_hashtags(text):
+        return [w for w in str(text).split() if w.startswith("#")]
+    df = df.copy()
+    df["hashtags"] = df["text"].apply(extract_hashtags)
+    all_tags = df.explode("hashtags").dropna(subset=["hashtags"])
+    return all_tags.groupby([all_tags["ts_ec"].dt.date, "hashtags"]).size()
+
+def distinct_per_tweet(df):
+    """Pares (tweet, hashtag en minúsculas): la regla de conteo del motor."""
+    tags = df["text"].str.split().explode()
+    tags = tags[tags.str.startswith("#", na=False)].str.lower()
+    return len(tags.reset_index().drop_duplicates())
+
+def timed(fn, *a):
+    t0 = time.perf_counter()
+    fn(*a)
+    return time.perf_counter() - t0
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--n", type=int, default=1_000_000)
+    ap.add_argument("--batch", type=int, default=10_000)
+    args = ap.parse_args()
+
+    df = synthetic(args.n)
+    batch = synthetic(args.batch, seed=1, start="2025-05-31")
+
+    t_orig = timed(original, df)
+    t_vec = timed(hashtag_counts, df, "D")
+    # cada hashtag cuenta una vez por tweet (los TAGS no llevan puntuación pegada)
+    assert distinct_per_tweet(df) == hashtag_counts(df, "D")["freq"].sum()
+    with tempfile.TemporaryDirectory() as d:
+        store = TrendStore(d)
+        t_build = timed(store.ingest, df)
+        t_inc = timed(store.ingest, batch)
+        t_rank = timed(store.emergent, "day")
+
+    print(f"n={args.n:,}  lote={args.batch:,}")
+    print(f"  original (apply+explode)  : {t_orig:8.2f}s  ({args.n / t_orig:,.0f} tweets/s)")
+    print(f"  nuevo (findall+factorize) : {t_vec:8.2f}s  ({args.n / t_vec:,.0f} tweets/s)"
+          f"  x{t_orig / t_vec:.1f}")
+    print(f"  construir tablas (día+hora): {t_build:8.2f}s")
+    print(f"  ingesta incremental lote  : {t_inc:8.3f}s  (vs {t_orig:.2f}s recomputando todo)")
+    print(f"  ranking z-score           : {t_rank:8.3f}s")
+
+if __name__ == "__main__":
+    main()
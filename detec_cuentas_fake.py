@@ -1,15 +1,249 @@
+"""Detección de cuentas coordinadas / automatizadas, escalable y por bloques.
+
+Señales por cuenta:
+- ritmo: tweets/día sobre el periodo activo de la propia cuenta (no el
+  global) y regularidad de los intervalos entre posts (CV bajo = robot);
+- texto casi duplicado entre cuentas distintas: MinHash + LSH por bandas,
+  agrupando por ordenación (sin comparar pares);
+- ráfagas sincronizadas: grupos de casi-duplicados publicados por varias
+  cuentas dentro de SYNC_WINDOW segundos.
+
+La entrada se lee por bloques (CSV con chunksize, lotes del Parquet de
+x_parquet o de la base SQLite de x_store) y por tweet solo se guardan cuenta, timestamp y las firmas de
+banda, así que el coste crece casi linealmente con el número de tweets.
+
+    python detec_cuentas_fake.py --input dataset_limpio.csv --top 20
+"""
+import argparse, os, re
+
 import numpy as np
 import pandas as pd
+from x_dedup import IntKeyIndex
+
+CHUNK_SIZE    = 200_000
+NUM_PERM      = 50              # permutaciones MinHash
+BANDS         = 10              # BANDS * ROWS = NUM_PERM; umbral ≈ (1/BANDS)^(1/ROWS) ≈ 0.63
+ROWS          = NUM_PERM // BANDS
+SHINGLE       = 3               # n-gramas de palabras
+SUB_BATCH     = 5_000           # tweets por bloque de cálculo MinHash (acota memoria)
+SYNC_WINDOW   = 300             # segundos: casi-duplicados de varias cuentas = ráfaga
+MIN_ACCOUNTS  = 3               # cuentas mínimas en una ráfaga sincronizada
+FAST_GAP      = 60              # segundos: intervalo "no humano"
+MAX_TWEETS_PER_DAY = 50         # criterio original, se mantiene como señal
+
+_PRIME = np.uint64(4294967291)  # primo < 2^32
+_rng = np.random.default_rng(1234)
+_A = _rng.integers(1, 2**31 - 1, NUM_PERM, dtype=np.uint64)
+_B = _rng.integers(0, 2**31 - 1, NUM_PERM, dtype=np.uint64)
+_BAND_MIX = _rng.integers(1, 2**63 - 1, ROWS, dtype=np.uint64) | np.uint64(1)
+_URL_RE = re.compile(r"https?://\S+")
+_WORD_RE = re.compile(r"\w+")
+
+def shingles(text):
+    # hash() de Python es estable dentro de un proceso, que es lo que importa aquí
+    words = _WORD_RE.findall(_URL_RE.sub(" ", str(text).lower()))
+    if len(words) < SHINGLE:
+        grams = words
+    else:
+        grams = [" ".join(words[i:i + SHINGLE]) for i in range(len(words) - SHINGLE + 1)]
+    return {hash(g) & 0xFFFFFFFF for g in grams}
+
+def band_hashes(texts):
+    """Firmas LSH (n x BANDS, uint64) de una lista de textos.
+
+    `valid` es False para filas sin shingles (texto vacío)."""
+    sets = [shingles(t) for t in texts]
+    valid = np.fromiter((len(s) > 0 for s in sets), bool, len(sets))
+    out = np.zeros((len(sets), BANDS), dtype=np.uint64)
+    idx = np.flatnonzero(valid)
+    for start in range(0, len(idx), SUB_BATCH):
+        part = idx[start:start + SUB_BATCH]
+        lens = np.array([len(sets[i]) for i in part])
+        flat = np.fromiter((h for i in part for h in sets[i]), np.uint64, lens.sum())
+        # (a*x + b) mod p para todas las permutaciones a la vez
+        perm = (flat[:, None] * _A[None, :] + _B[None, :]) % _PRIME
+        offsets = np.concatenate(([0], np.cumsum(lens)[:-1]))
+        sig = np.minimum.reduceat(perm, offsets, axis=0)
+        bands = sig.reshape(len(part), BANDS, ROWS)
+        out[part] = (bands * _BAND_MIX).sum(axis=2)  # mezcla con desbordamiento uint64
+    return out, valid
+
+def _epoch_seconds(ts):
+    ts = pd.to_datetime(ts, utc=True)
+    return ((ts - pd.Timestamp(0, tz="UTC")) // pd.Timedelta(seconds=1)).astype("int64")
+
+def iter_chunks(path, chunksize=CHUNK_SIZE):
+    """Bloques con columnas handle, text y ts (segundos epoch, int64)."""
+    if path.endswith(".sqlite"):
+        from x_store import TweetStore
+        store = TweetStore(path)
+        try:
+            for rows in store.iter_tweets(("handle", "text", "ts"), chunksize):
+                df = pd.DataFrame(rows, columns=["handle", "text", "ts"]).dropna(subset=["ts"])
+                df["ts"] = df["ts"].astype("int64")
+                yield df
+        finally:
+            store.close()
+        return
+    if os.path.isdir(path):
+        # salida cruda por corrida: un tweet capturado dos veces daría un
+        # intervalo de 0 s (fast_gaps), así que se deduplica por tweet_id
+        import pyarrow.dataset as ds
+        seen = IntKeyIndex()
+        dataset = ds.dataset(path, format="parquet", partitioning="hive")
+        for batch in dataset.to_batches(columns=["tweet_id", "handle", "text", "timestamp"],
+                                        batch_size=chunksize):
+            df = batch.to_pandas()
+            ids = df.pop("tweet_id")
+            new = [pd.isna(t) or seen.add(int(t)) for t in ids.tolist()]
+            df = df[new]
+            df["ts"] = _epoch_seconds(df.pop("timestamp"))
+            yield df
+        return
+    for df in pd.read_csv(path, usecols=["handle", "text", "ts_ec"], chunksize=chunksize):
+        df["ts"] = _epoch_seconds(df.pop("ts_ec"))
+        yield df
+
+class _UnionFind:
+    def __init__(self, n):
+        self.parent = list(range(n))
+
+    def find(self, x):
+        p = self.parent
+        root = x
+        while p[root] != root:
+            root = p[root]
+        while p[x] != root:
+            p[x], x = root, p[x]
+        return root
+
+    def union(self, a, b):
+        ra, rb = self.find(a), self.find(b)
+        if ra != rb:
+            self.parent[rb] = ra
+
+def near_duplicate_clusters(bands, valid):
+    """Id de grupo por tweet (-1 = sin casi-duplicados), vía igualdad de banda."""
+    n = len(bands)
+    uf = _UnionFind(n)
+    touched = np.zeros(n, bool)
+    for b in range(BANDS):
+        idx = np.flatnonzero(valid)
+        col = bands[idx, b]
+        order = np.argsort(col, kind="stable")
+        sorted_col = col[order]
+        same = np.flatnonzero(sorted_col[1:] == sorted_col[:-1])
+        for k in same:
+            i, j = idx[order[k]], idx[order[k + 1]]
+            uf.union(i, j)
+            touched[i] = touched[j] = True
+    cluster = np.full(n, -1)
+    for i in np.flatnonzero(touched):
+        cluster[i] = uf.find(i)
+    return cluster
+
+def timing_features(handles, ts):
+    """Rasgos de ritmo por cuenta, vectorizados tras un único ordenamiento."""
+    df = pd.DataFrame({"handle": handles, "ts": ts}).sort_values(["handle", "ts"])
+    df["gap"] = df.groupby("handle")["ts"].diff()
+    df["fast"] = (df["gap"] < FAST_GAP).astype(float).where(df["gap"].notna())
+    g = df.groupby("handle")
+    feats = pd.DataFrame({
+        "tweets": g.size(),
+        "first": g["ts"].min(),
+        "last": g["ts"].max(),
+        "gap_median": g["gap"].median(),
+        "gap_cv": g["gap"].std(ddof=0) / g["gap"].mean(),
+        "fast_gaps": g["fast"].mean().fillna(0.0),
+    })
+    days = (feats["last"] - feats["first"]) / 86400 + 1
+    feats["tweets_per_day"] = feats["tweets"] / days.clip(lower=1)
+    return feats.drop(columns=["first", "last"])
+
+def coordination_features(handles, ts, cluster):
+    """Por cuenta: tweets en grupos multi-cuenta, cuentas socias y ráfagas."""
+    df = pd.DataFrame({"handle": handles, "ts": ts, "cluster": cluster})
+    df = df[df["cluster"] >= 0]
+    # columnas float: tras el join + fillna de rank_suspects no deben quedar como object
+    empty = pd.DataFrame(columns=["dup_tweets", "partners", "sync_bursts"], dtype=float)
+    if df.empty:
+        return empty
+    g = df.groupby("cluster")
+    info = pd.DataFrame({
+        "accounts": g["handle"].nunique(),
+        "span": g["ts"].max() - g["ts"].min(),
+    })
+    multi = info[info["accounts"] >= 2]
+    df = df[df["cluster"].isin(multi.index)]
+    if df.empty:
+        return empty
+    df = df.join(multi, on="cluster")
+    df["sync"] = (df["accounts"] >= MIN_ACCOUNTS) & (df["span"] <= SYNC_WINDOW)
+    hc = df.drop_duplicates(["handle", "cluster"])   # una fila por (cuenta, grupo)
+    per = hc.groupby("handle")
+    out = pd.DataFrame({
+        "dup_tweets": df.groupby("handle").size(),
+        # socios = otras cuentas en sus grupos (cota superior si se repiten entre grupos)
+        "partners": per["accounts"].sum() - per.size(),
+        "sync_bursts": hc[hc["sync"]].groupby("handle").size(),
+    }).fillna({"sync_bursts": 0})
+    return out.astype(float)
+
+def rank_suspects(timing, coord):
+    t = timing.join(coord, how="left").fillna({"dup_tweets": 0, "partners": 0, "sync_bursts": 0})
+    t["dup_ratio"] = t["dup_tweets"] / t["tweets"]
+    regular = (1 - t["gap_cv"].clip(upper=1)).fillna(0)   # intervalos muy regulares
+    t["score"] = (
+        np.log1p(t["tweets_per_day"]) / np.log1p(MAX_TWEETS_PER_DAY)
+        + regular * (t["tweets"] >= 5)
+        + t["fast_gaps"]
+        + 2 * t["dup_ratio"] * (t["partners"] > 0)
+        + np.log1p(t["sync_bursts"])
+    )
+    t["bot_rate"] = t["tweets_per_day"] > MAX_TWEETS_PER_DAY
+    return t.sort_values("score", ascending=False)
+
+def detect(path, chunksize=CHUNK_SIZE):
+    handle_codes, names = {}, []
+    codes, times, band_parts, valid_parts = [], [], [], []
+    for chunk in iter_chunks(path, chunksize):
+        for h in chunk["handle"].unique():
+            if h not in handle_codes:
+                handle_codes[h] = len(names)
+                names.append(h)
+        codes.append(chunk["handle"].map(handle_codes).to_numpy(np.int64))
+        times.append(chunk["ts"].to_numpy(np.int64))
+        b, v = band_hashes(chunk["text"].tolist())
+        band_parts.append(b)
+        valid_parts.append(v)
+    if not codes:
+        return pd.DataFrame()
+    codes = np.concatenate(codes)
+    times = np.concatenate(times)
+    cluster = near_duplicate_clusters(np.concatenate(band_parts), np.concatenate(valid_parts))
+    timing = timing_features(codes, times)
+    coord = coordination_features(codes, times, cluster)
+    ranked = rank_suspects(timing, coord)
+    ranked.index = [names[i] for i in ranked.index]
+    ranked.index.name = "handle"
+    return ranked
 
-# Dataset ya limpio
-df = pd.read_csv("dataset_limpio.csv", parse_dates=["ts_ec"])
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--input", default="dataset_limpio.csv",
+                    help="CSV limpio (por defecto), carpeta Parquet (x_parquet) o base .sqlite de x_store")
+    ap.add_argument("--chunksize", type=int, default=CHUNK_SIZE)
+    ap.add_argument("--top", type=int, default=20)
+    ap.add_argument("--out", default="sospechosos.csv")
+    args = ap.parse_args()
 
-# Publicaciones por cuenta
-user_activity = df.groupby("handle")["ts_ec"].count().reset_index(name="tweets")
-user_activity["tweets_per_day"] = user_activity["tweets"] / (
-    (df["ts_ec"].max() - df["ts_ec"].min()).days + 1
-)
+    suspects = detect(args.input, args.chunksize)
+    if suspects.empty:
+        print("Sin datos.")
+        return
+    suspects.to_csv(args.out)
+    print(f"Posibles cuentas automatizadas/coordinadas (tabla completa en {args.out}):\n",
+          suspects.head(args.top))
 
-# Posibles bots: más de 50 tweets/día en ventana observada
-suspects = user_activity[user_activity["tweets_per_day"] > 50]
-print("Posibles cuentas automatizadas:\n", suspects.head())
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+"""Limpieza de las salidas del scraper -> dataset_limpio.csv.
+
+Lee muchos x_tweets_*.json / .ndjson / .csv por bloques y escribe el CSV
+limpio que consumen narrativa_emergente.py y detec_cuentas_fake.py:
+
+- `timestamp` UTC -> `ts_ec` en hora de Ecuador (America/Guayaquil, -05:00);
+- `text` con espacios/saltos de línea colapsados, Unicode NFC, sin enlaces
+  t.co (adjuntos opacos) y con los demás URLs sin parámetros de rastreo;
+- `tweet_id` sacado del permalink;
+- deduplicación entre todos los archivos por tweet_id (índices de x_dedup).
+
+Los bloques se limpian en paralelo (multiprocessing) y se escriben en
+orden; en memoria solo hay unos pocos bloques y el índice de IDs. Los
+archivos más recientes se leen primero, así gana la copia con métricas más
+frescas.
+
+    python limpieza.py "x_tweets_*.json"                 # rehace dataset_limpio.csv
+    python limpieza.py "x_live_*.ndjson" --append        # solo añade lo nuevo
+"""
+import argparse, csv, glob, json, os, re, shutil, tempfile, unicodedata
+from datetime import datetime
+from itertools import islice
+from multiprocessing import Pool
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+from zoneinfo import ZoneInfo
+
+from x_dedup import make_dedup_index, row_key, tweet_id_from_permalink
+from x_parquet import TZ_EC
+from x_sinks import iter_ndjson
+
+CLEAN_CSV     = "dataset_limpio.csv"
+CLEAN_FIELDS  = ["display_name","handle","text","ts_ec","permalink","replies","retweets","likes",
+                 "tweet_id"]
+CHUNK_ROWS    = 20_000           # filas por bloque enviado a un proceso
+WORKERS       = os.cpu_count() or 1
+DEDUP_INDEX   = "ids"            # "sqlite" o "bloom" para históricos muy grandes
+DROP_TCO      = True             # quitar enlaces t.co del texto
+TRACKING_PARAMS = re.compile(r"^(utm_\w+|s|t|ref_src|ref_url|fbclid|gclid|igshid)$")
+
+_TZ = ZoneInfo(TZ_EC)
+_WS_RE = re.compile(r"\s+")
+_URL_RE = re.compile(r"https?://\S+")
+_TCO_RE = re.compile(r"https?://t\.co/\w+")
+
+def iter_raw(path):
+    """Filas crudas de una salida del scraper (.json con sobre, .ndjson o .csv)."""
+    if path.endswith(".ndjson"):
+        yield from iter_ndjson(path)
+    elif path.endswith(".json"):
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        yield from (data.get("tweets", []) if isinstance(data, dict) else data)
+    else:
+        with open(path, "r", newline="", encoding="utf-8") as f:
+            yield from csv.DictReader(f)
+
+def to_ts_ec(ts):
+    """'2025-05-31T13:12:11.000Z' -> '2025-05-31 08:12:11-05:00' (None si no parsea)."""
+    if not ts:
+        return None
+    try:
+        dt = datetime.fromisoformat(str(ts).replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=ZoneInfo("UTC"))
+    return dt.astimezone(_TZ).isoformat(sep=" ", timespec="seconds")
+
+def _canonical_url(m):
+    parts = urlsplit(m.group(0).rstrip(".,;:!?)…"))
+    query = urlencode([(k, v) for k, v in parse_qsl(parts.query)
+                       if not TRACKING_PARAMS.match(k)])
+    return urlunsplit((parts.scheme, parts.netloc.lower(), parts.path.rstrip("/") or "/",
+                       query, ""))
+
+def normalize_text(text):
+    text = unicodedata.normalize("NFC", str(text or ""))
+    if DROP_TCO:
+        text = _TCO_RE.sub(" ", text)
+    text = _URL_RE.sub(_canonical_url, text)
+    return _WS_RE.sub(" ", text).strip()
+
+def _count(v):
+    try:
+        return int(v)
+    except (TypeError, ValueError):
+        return 0
+
+def clean_row(r):
+    """Fila cruda -> fila limpia (CLEAN_FIELDS), o None si no tiene fecha."""
+    ts_ec = r.get("ts_ec") or to_ts_ec(r.get("timestamp"))
+    if not ts_ec:
+        return None
+    tid = r.get("tweet_id") or tweet_id_from_permalink(r.get("permalink"))
+    return {
+        "display_name": _WS_RE.sub(" ", str(r.get("display_name") or "")).strip(),
+        "handle": r.get("handle") or "",
+        "text": normalize_text(r.get("text")),
+        "ts_ec": ts_ec,
+        "permalink": r.get("permalink") or "",
+        "replies": _count(r.get("replies")),
+        "retweets": _count(r.get("retweets")),
+        "likes": _count(r.get("likes")),
+        "tweet_id": int(tid) if tid else "",
+    }
+
+def clean_chunk(rows):
+    # Se ejecuta en un proceso del pool: solo trabajo por fila, sin estado
+    return [c for c in map(clean_row, rows) if c is not None], len(rows)
+
+def iter_chunks(paths, size=CHUNK_ROWS):
+    rows = (r for p in paths for r in iter_raw(p))
+    while True:
+        chunk = list(islice(rows, size))
+        if not chunk:
+            return
+        yield chunk
+
+def clean(paths, out_path=CLEAN_CSV, append=False, workers=WORKERS, chunk_rows=CHUNK_ROWS,
+          dedup=DEDUP_INDEX):
+    """Limpia y deduplica `paths` en `out_path`; devuelve (leídas, escritas)."""
+    # Más recientes primero: la primera copia de cada tweet es la que se queda
+    paths = sorted(paths, key=os.path.getmtime, reverse=True)
+    # Índice propio de esta limpieza: los de disco (sqlite/bloom) van a un
+    # directorio temporal, nunca a x_seen/ del scraper. Con --append se
+    # reconstruye desde el CSV existente, así que no hace falta conservarlo.
+    tmpdir = tempfile.mkdtemp(prefix=".limpieza_", dir=os.path.dirname(os.path.abspath(out_path)))
+    kw = {"path": os.path.join(tmpdir, f"seen.{dedup}")} if dedup in ("sqlite", "bloom") else {}
+    seen = make_dedup_index(dedup, **kw)
+    target = out_path if append else out_path + ".tmp"
+    new_file = not (append and os.path.exists(out_path) and os.path.getsize(out_path))
+    fields = CLEAN_FIELDS
+    read = written = 0
+    try:
+        if not new_file:
+            for r in iter_raw(out_path):
+                seen.add(row_key(r))
+            # respetar las columnas del CSV existente (p. ej. uno anterior sin tweet_id)
+            with open(out_path, "r", newline="", encoding="utf-8") as f:
+                fields = next(csv.reader(f))
+        with open(target, "a" if append else "w", newline="", encoding="utf-8") as f, \
+             Pool(workers) as pool:
+            w = csv.DictWriter(f, fieldnames=fields, extrasaction="ignore")
+            if new_file:
+                w.writeheader()
+            # imap ordenado: a lo sumo unos pocos bloques en vuelo por proceso
+            for rows, n in pool.imap(clean_chunk, iter_chunks(paths, chunk_rows)):
+                read += n
+                for row in rows:
+                    if seen.add(row_key(row)):
+                        w.writerow(row)
+                        written += 1
+                print(f"  [~] {read} leídas, {written} escritas")
+    finally:
+        if hasattr(seen, "close"):
+            seen.close()
+        shutil.rmtree(tmpdir, ignore_errors=True)
+    if not append:
+        if written == 0 and os.path.exists(out_path):
+            # nunca cambiar un CSV con datos por uno con solo la cabecera
+            os.remove(target)
+            print(f"(BAD) Ninguna fila válida; {out_path} queda como estaba.")
+        else:
+            os.replace(target, out_path)
+    return read, written
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("inputs", nargs="+", help="archivos o patrones (x_tweets_*.json, *.ndjson, *.csv)")
+    ap.add_argument("--out", default=CLEAN_CSV)
+    ap.add_argument("--append", action="store_true",
+                    help="añadir solo tweets que no estén ya en --out")
+    ap.add_argument("--workers", type=int, default=WORKERS)
+    ap.add_argument("--chunk", type=int, default=CHUNK_ROWS)
+    ap.add_argument("--dedup", choices=["ids", "sqlite", "bloom"], default=DEDUP_INDEX)
+    args = ap.parse_args()
+
+    paths = sorted({p for pat in args.inputs for p in glob.glob(pat)}
+                   - {os.path.abspath(args.out), args.out})
+    if not paths:
+        raise SystemExit("(BAD) Ningún archivo de entrada.")
+    read, written = clean(paths, args.out, args.append, args.workers, args.chunk, args.dedup)
+    print(f"(OK) {len(paths)} archivos, {read} filas leídas, {written} únicas")
+    print(f"(SAVE) CSV limpio en: {args.out}")
+
+if __name__ == "__main__":
+    main()
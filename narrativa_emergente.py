@@ -1,20 +1,274 @@
+"""Hashtags emergentes: crecimiento frente a una línea base móvil.
+
+Mantiene tablas de conteo (hashtag x día y hashtag x hora) que se actualizan
+de forma incremental con cada lote nuevo del scraper, sin reprocesar el
+histórico. "Emergente" = z-score del último periodo contra la media y
+desviación de los WINDOW periodos anteriores, no la frecuencia cruda.
+
+    python narrativa_emergente.py                         # construye / muestra
+    python narrativa_emergente.py --ingest x_tweets_20251021_1200.ndjson
+    python narrativa_emergente.py --granularity hour --window 48
+    python narrativa_emergente.py --rebuild --input x_parquet  # desde el dataset Parquet
+    python narrativa_emergente.py --store x_tweets.sqlite  # agregación por SQL (x_store)
+"""
+import argparse, json, os, re
+
+import numpy as np
 import pandas as pd
-from collections import Counter
-import matplotlib.pyplot as plt
+from x_dedup import SqliteKeyIndex, row_key
+from x_parquet import load_tweets, TZ_EC
+
+COUNTS_FILE   = "trend_counts_{gran}.csv"   # tablas de conteo incrementales
+INGESTED_FILE = "trend_ingested.txt"        # lotes ya sumados (no contar dos veces)
+SEEN_FILE     = "trend_seen.sqlite"         # tweet_ids ya contados (índice de x_dedup)
+GRANULARITIES = {"day": "D", "hour": "h"}
+WINDOW        = 7                           # periodos de línea base
+MIN_COUNT     = 3                           # mínimo en el periodo actual para puntuar
+HASHTAG_RE    = re.compile(r"#\w+")
+
+def extract_hashtags(df):
+    """(posiciones de fila, códigos, hashtags en minúsculas) de los tweets de df.
+
+    Cada hashtag cuenta una vez por tweet ("#Paro ... #paro" es uno), la
+    misma regla que el índice de hashtags de x_store, para que --store y el
+    CSV den las mismas frecuencias. Un findall por texto, saltando los que
+    no tienen '#', y las minúsculas solo sobre los hashtags distintos:
+    str.extractall / apply+explode crean un objeto pandas por aparición y
+    son varias veces más lentos."""
+    findall = HASHTAG_RE.findall
+    rows, tags = [], []
+    for i, text in enumerate(df["text"].astype(str).tolist()):
+        if "#" in text:
+            found = findall(text)
+            rows.extend([i] * len(found))
+            tags.extend(found)
+    codes, uniq = pd.factorize(np.array(tags, dtype=object))
+    lower_codes, lower = pd.factorize(pd.Index(uniq, dtype=object).str.lower())
+    # un par (tweet, hashtag) por tweet
+    pairs = pd.unique(np.array(rows, dtype=np.int64) * max(len(lower), 1) + lower_codes[codes])
+    return pairs // max(len(lower), 1), pairs % max(len(lower), 1), lower
+
+def tweet_keys(df):
+    """Clave entera por fila como x_dedup.row_key: tweet_id, el ID del
+    permalink o, sin ninguno, un hash de handle + texto."""
+    ids = pd.to_numeric(df["tweet_id"], errors="coerce") if "tweet_id" in df \
+        else pd.Series(np.nan, index=df.index)
+    if "permalink" in df:
+        from_link = df["permalink"].astype("string").str.extract(r"/status/(\d+)", expand=False)
+        ids = ids.fillna(pd.to_numeric(from_link, errors="coerce"))
+    keys = ids.to_numpy(dtype=object)
+    miss = np.flatnonzero(ids.isna().to_numpy())
+    if len(miss):
+        handles = (df["handle"].fillna("").astype(str).to_numpy()[miss] if "handle" in df
+                   else [""] * len(miss))
+        texts = df["text"].fillna("").astype(str).to_numpy()[miss]
+        keys[miss] = [row_key({"handle": h, "text": t}) for h, t in zip(handles, texts)]
+    return [int(k) for k in keys]
+
+def hashtag_counts(df, freq, tags=None):
+    """Conteos (bucket, hashtag) de un DataFrame con columnas text y ts_ec.
+
+    `tags` es el resultado de extract_hashtags(df), para no extraer dos veces
+    cuando se cuentan varias granularidades del mismo lote."""
+    rows, codes, uniq = tags if tags is not None else extract_hashtags(df)
+    if not len(rows):
+        return pd.DataFrame(columns=["bucket", "hashtag", "freq"])
+    bcodes, buckets = pd.factorize(df["ts_ec"].dt.floor(freq).take(rows))
+    keys, counts = np.unique(bcodes.astype(np.int64) * len(uniq) + codes, return_counts=True)
+    return pd.DataFrame({
+        "bucket": buckets[keys // len(uniq)],
+        "hashtag": np.asarray(uniq, dtype=object)[keys % len(uniq)],
+        "freq": counts,
+    })
+
+class TrendStore:
+    """Tablas de conteo por granularidad, persistidas en CSV.
+
+    Junto a las tablas va un índice SQLite (SEEN_FILE) con los tweets ya
+    contados: lotes que se solapan, o los crudos que produjeron el dataset
+    limpio, no suman dos veces el mismo tweet."""
+
+    def __init__(self, directory="."):
+        self.directory = directory
+        self._seen = None
+        self.load()
+
+    @property
+    def seen(self):
+        if self._seen is None:
+            # sin commits intermedios: se confirma en save(), junto con las tablas
+            self._seen = SqliteKeyIndex(os.path.join(self.directory, SEEN_FILE),
+                                        commit_every=float("inf"))
+        return self._seen
+
+    def load(self):
+        directory = self.directory
+        self.counts = {}
+        for gran in GRANULARITIES:
+            path = self._path(gran)
+            if os.path.exists(path):
+                c = pd.read_csv(path)
+                c["bucket"] = pd.to_datetime(c["bucket"], utc=True).dt.tz_convert(TZ_EC)
+            else:
+                c = pd.DataFrame(columns=["bucket", "hashtag", "freq"])
+            self.counts[gran] = c
+        ing = os.path.join(directory, INGESTED_FILE)
+        self.ingested = set()
+        if os.path.exists(ing):
+            with open(ing, "r", encoding="utf-8") as f:
+                self.ingested = {ln.strip() for ln in f if ln.strip()}
+
+    def load_from_store(self, db, window=WINDOW):
+        """Conteos de las últimas window+1 ventanas de cada granularidad,
+        agregados en SQL sobre el índice de hashtags de x_store."""
+        from x_store import TweetStore, BUCKETS
+        store = TweetStore(db)
+        try:
+            last = store.conn.execute("SELECT MAX(ts) FROM hashtags").fetchone()[0]
+            self._clear()
+            if last is None:
+                return
+            for gran in GRANULARITIES:
+                since = last - (window + 1) * BUCKETS[gran]
+                c = pd.DataFrame(store.hashtag_counts(gran, since=since),
+                                 columns=["bucket", "hashtag", "freq"])
+                c["bucket"] = pd.to_datetime(c["bucket"], unit="s", utc=True).dt.tz_convert(TZ_EC)
+                self.counts[gran] = c
+        finally:
+            store.close()
+
+    def _clear(self):
+        self.counts = {g: pd.DataFrame(columns=["bucket", "hashtag", "freq"])
+                       for g in GRANULARITIES}
+        self.ingested = set()
+
+    def reset(self):
+        """Vacía las tablas, los lotes ingeridos y los tweets contados."""
+        self._clear()
+        self.seen.conn.execute("DELETE FROM seen")
+
+    def _path(self, gran):
+        return os.path.join(self.directory, COUNTS_FILE.format(gran=gran))
+
+    @property
+    def empty(self):
+        return all(c.empty for c in self.counts.values())
+
+    def ingest(self, df, source=None):
+        """Suma un lote a las tablas; solo se agrega sobre los tweets del
+        lote que no se habían contado. Devuelve cuántos eran nuevos."""
+        if source is not None:
+            if source in self.ingested:
+                return 0
+            self.ingested.add(source)
+        add = self.seen.add
+        df = df[[add(k) for k in tweet_keys(df)]].reset_index(drop=True)
+        if df.empty:
+            return 0
+        tags = extract_hashtags(df)
+        for gran, freq in GRANULARITIES.items():
+            batch = hashtag_counts(df, freq, tags)
+            if self.counts[gran].empty:
+                # tabla nueva: el lote ya viene agregado (y concatenar con un
+                # DataFrame vacío deja columnas object, lentas de agrupar)
+                self.counts[gran] = batch
+                continue
+            merged = pd.concat([self.counts[gran], batch], ignore_index=True)
+            self.counts[gran] = (merged.groupby(["bucket", "hashtag"], sort=False)["freq"]
+                                 .sum().reset_index())
+        return len(df)
+
+    def save(self):
+        for gran, c in self.counts.items():
+            c.to_csv(self._path(gran), index=False)
+        with open(os.path.join(self.directory, INGESTED_FILE), "w", encoding="utf-8") as f:
+            f.write("\n".join(sorted(self.ingested)))
+        if self._seen is not None:
+            self._seen.flush()
+
+    def close(self):
+        if self._seen is not None:
+            self._seen.conn.close()   # sin flush: lo no guardado con save() se descarta
+            self._seen = None
+
+    def emergent(self, gran="day", window=WINDOW, min_count=MIN_COUNT, top=10):
+        """Ranking del último periodo por z-score contra los `window` anteriores."""
+        c = self.counts[gran]
+        if c.empty:
+            return c
+        freq = GRANULARITIES[gran]
+        last = c["bucket"].max()
+        periods = pd.date_range(end=last, periods=window + 1, freq=freq)
+        recent = c[c["bucket"] >= periods[0]]
+        wide = (recent.pivot_table(index="hashtag", columns="bucket", values="freq",
+                                   aggfunc="sum", fill_value=0)
+                .reindex(columns=periods, fill_value=0))
+        current = wide[last]
+        base = wide[periods[:-1]]
+        mean = base.mean(axis=1)
+        std = base.std(axis=1, ddof=0)
+        score = pd.DataFrame({
+            "hashtag": wide.index,
+            "freq": current.to_numpy(),
+            "baseline": mean.to_numpy(),
+            # std mínima 1 para que un hashtag sin historia no dé z infinito
+            "z": ((current - mean) / np.maximum(std, 1.0)).to_numpy(),
+            "growth": ((current + 1) / (mean + 1)).to_numpy(),
+        })
+        score = score[score["freq"] >= min_count]
+        score.insert(0, "periodo", last)
+        return score.sort_values(["z", "freq"], ascending=False).head(top)
+
+def read_batch(path):
+    """Lee un lote del scraper (.ndjson, .json con sobre, .csv) con ts_ec."""
+    if path.endswith(".ndjson"):
+        df = pd.read_json(path, lines=True, dtype=False)
+    elif path.endswith(".json"):
+        with open(path, "r", encoding="utf-8") as f:
+            df = pd.DataFrame(json.load(f)["tweets"])
+    else:
+        df = pd.read_csv(path)
+    if "ts_ec" in df:
+        df["ts_ec"] = pd.to_datetime(df["ts_ec"], utc=True).dt.tz_convert(TZ_EC)
+    else:
+        df["ts_ec"] = pd.to_datetime(df["timestamp"], utc=True).dt.tz_convert(TZ_EC)
+    return df.dropna(subset=["ts_ec"])
 
-# Dataset ya limpio
-df = pd.read_csv("dataset_limpio.csv", parse_dates=["ts_ec"])
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--ingest", nargs="*", default=[], help="lotes nuevos del scraper")
+    ap.add_argument("--granularity", choices=list(GRANULARITIES), default="day")
+    ap.add_argument("--window", type=int, default=WINDOW)
+    ap.add_argument("--top", type=int, default=10)
+    ap.add_argument("--rebuild", action="store_true", help="recalcular desde el dataset limpio")
+    ap.add_argument("--input", default="dataset_limpio.csv",
+                    help="dataset limpio para construir/--rebuild: CSV o carpeta Parquet de x_parquet")
+    ap.add_argument("--store", help="base SQLite de x_store: agregar ahí en vez de leer CSV")
+    args = ap.parse_args()
 
-# Top hashtags por día
-def extract_hashtags(text):
-    return [w for w in str(text).split() if w.startswith("#")]
+    if args.store:
+        store = TrendStore()
+        store.load_from_store(args.store, window=args.window)
+        print(store.emergent(args.granularity, window=args.window, top=args.top).to_string(index=False))
+        return
 
-df["hashtags"] = df["text"].apply(extract_hashtags)
+    store = TrendStore()
+    if args.rebuild or store.empty:
+        store.reset()
+        df = load_tweets(args.input, columns=["tweet_id", "permalink", "handle", "text", "ts_ec"])
+        df["ts_ec"] = pd.to_datetime(df["ts_ec"], utc=True).dt.tz_convert(TZ_EC)
+        store.ingest(df)
+    for path in args.ingest:
+        source = os.path.abspath(path)
+        if source in store.ingested:
+            print(f"(SKIP) {path} ya ingerido")
+            continue
+        n = store.ingest(read_batch(path), source=source)
+        print(f"(INGEST) {path}: {n} tweets nuevos")
+    store.save()
+    store.close()
 
-# Expandir hashtags en filas
-all_tags = df.explode("hashtags").dropna(subset=["hashtags"])
-trend = all_tags.groupby([all_tags["ts_ec"].dt.date,"hashtags"]).size().reset_index(name="freq")
+    print(store.emergent(args.granularity, window=args.window, top=args.top).to_string(index=False))
 
-# Detectar hashtags con mayor crecimiento (emergentes)
-trend_today = trend[trend["ts_ec"] == trend["ts_ec"].max()]
-print(trend_today.sort_values("freq", ascending=False).head(10))
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,11 @@
+"""Archivos de lote de x_crapy_json (--batch) y x_pool."""
+import pytest
+
+load_batch = pytest.importorskip("x_crapy_json").load_batch
+
+def test_txt_comments_keep_hashtag_queries(tmp_path):
+    path = tmp_path / "consultas.txt"
+    path.write_text("# comentario\n#ParoNacional lang:es\n#\n\n  paro nacional  \n", encoding="utf-8")
+    jobs = load_batch(str(path), default_max=50)
+    assert [j["query"] for j in jobs] == ["#ParoNacional lang:es", "paro nacional"]
+    assert all(j["max"] == 50 for j in jobs)
@@ -0,0 +1,56 @@
+"""TimelineCapture con un driver falso que sirve las respuestas grabadas."""
+import json, os
+
+import pytest
+
+# x_crapy_json necesita selenium y webdriver_manager instalados
+TimelineCapture = pytest.importorskip("x_crapy_json").TimelineCapture
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+
+class FakeDriver:
+    """Cada llamada a get_log entrega una respuesta SearchTimeline."""
+
+    def __init__(self, names):
+        self.bodies = {}
+        self.batches = []
+        for i, name in enumerate(names):
+            with open(os.path.join(FIXTURES, name), "r", encoding="utf-8") as f:
+                self.bodies[str(i)] = f.read()
+            self.batches.append([self._event("Network.responseReceived", i,
+                                             response={"url": "https://x.com/i/api/graphql/x/SearchTimeline",
+                                                       "status": 200}),
+                                 self._event("Network.loadingFinished", i)])
+
+    @staticmethod
+    def _event(method, req_id, **params):
+        return {"message": json.dumps({"message": {"method": method,
+                                                   "params": {"requestId": str(req_id), **params}}})}
+
+    def get_log(self, kind):
+        return self.batches.pop(0) if self.batches else []
+
+    def execute_cdp_cmd(self, cmd, args):
+        return {"body": self.bodies[args["requestId"]]}
+
+def test_pages_until_repeated_cursor():
+    driver = FakeDriver(["search_timeline_page1.json", "search_timeline_page2.json",
+                         "search_timeline_end.json"])
+    capture = TimelineCapture()
+    assert len(capture.poll(driver)) == 4
+    assert len(capture.poll(driver)) == 1
+    assert not capture.exhausted
+    assert capture.poll(driver) == []
+    assert capture.exhausted
+
+def test_error_payload_is_not_the_end():
+    driver = FakeDriver(["search_timeline_page1.json", "search_timeline_errors.json",
+                         "search_timeline_page2.json"])
+    capture = TimelineCapture()
+    capture.poll(driver)
+    assert capture.poll(driver) == []
+    assert not capture.exhausted
+    assert capture.errors == 1
+    # el cursor de la última página válida se conserva
+    assert capture.cursor == "DAADDAABCgABGsSu0VbXMAAKAAIaxKvBbBdgAQ"
+    assert len(capture.poll(driver)) == 1
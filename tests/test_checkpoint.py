@@ -0,0 +1,22 @@
+"""Reanudación de x_checkpoint: until: al segundo y mismo slug que las salidas."""
+import pytest
+
+query_slug = pytest.importorskip("x_crapy_json").query_slug
+
+from x_checkpoint import Checkpoint
+
+def test_resume_query_second_precision(tmp_path):
+    cp = Checkpoint("#ParoNacional lang:es until:2025-06-01", str(tmp_path))
+    cp.observe([{"timestamp": "2025-05-31T13:12:11.000Z"},
+                {"timestamp": "2025-05-31T12:50:02.000Z"}])
+    assert cp.resume_query() == "#ParoNacional lang:es until:2025-05-31_12:50:03_UTC"
+
+def test_saved_and_loaded_by_query_slug(tmp_path):
+    query = "paro nacional " * 10
+    cp = Checkpoint(query, str(tmp_path))
+    cp.observe([{"timestamp": "2025-05-31T13:12:11.000Z"}])
+    cp.save({1: True, 2: True})
+    assert cp.path == str(tmp_path / (query_slug(query) + ".json"))
+    loaded = Checkpoint.load(query, str(tmp_path))
+    assert loaded.resuming and loaded.count == 2
+    assert loaded.seen_index() == {1: True, 2: True}
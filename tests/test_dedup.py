@@ -0,0 +1,44 @@
+"""Índices en disco de x_dedup: guardar, recargar y reanudar."""
+import pytest
+
+from x_dedup import BloomKeyIndex, SqliteKeyIndex
+
+KEYS = [1928801685054345407 + i for i in range(500)]
+
+def reopen(kind, path):
+    if kind == "bloom":
+        return BloomKeyIndex(capacity=10_000, fp_rate=1e-4, path=path)
+    return SqliteKeyIndex(path, commit_every=5000)
+
+@pytest.mark.parametrize("kind", ["bloom", "sqlite"])
+def test_reload_keeps_keys(tmp_path, kind):
+    path = str(tmp_path / f"q.{kind}")
+    idx = reopen(kind, path)
+    assert all(idx.add(k) for k in KEYS)
+    idx.close()   # sqlite: 500 < commit_every, solo close() los confirma
+    idx = reopen(kind, path)
+    assert all(k in idx for k in KEYS)
+    assert not any(idx.add(k) for k in KEYS)
+    # la corrida nueva empieza en 0; el histórico queda en total
+    assert len(idx) == 0 and idx.total == len(KEYS)
+    idx.close()
+
+@pytest.mark.parametrize("kind", ["bloom", "sqlite"])
+def test_resume_counts_previous_run(tmp_path, kind):
+    path = str(tmp_path / f"q.{kind}")
+    idx = reopen(kind, path)
+    for k in KEYS[:300]:
+        idx.add(k)
+    idx.close()
+    idx = reopen(kind, path)
+    idx.resume(300)
+    assert len(idx) == 300
+    assert sum(idx.add(k) for k in KEYS) == 200
+    assert len(idx) == 500 and idx.total == 500
+    idx.close()
+
+def test_bloom_header_required(tmp_path):
+    path = tmp_path / "q.bloom"
+    path.write_bytes(bytes(1024))
+    with pytest.raises(ValueError):
+        BloomKeyIndex(path=str(path))
@@ -0,0 +1,36 @@
+"""poll_once de x_monitor sobre una timeline simulada (sin Chrome)."""
+import pytest
+
+x_monitor = pytest.importorskip("x_monitor")
+
+class FakeDriver:
+    def find_element(self, by, value):
+        return self
+
+    def send_keys(self, key):
+        pass
+
+class NoWait:
+    def wait(self):
+        pass
+
+def timeline(monkeypatch, pages):
+    """Cada vuelta de scroll entrega la siguiente página de IDs."""
+    pages = [[{"tweet_id": str(t), "permalink": f"https://x.com/a/status/{t}"} for t in p]
+             for p in pages]
+    monkeypatch.setattr(x_monitor, "install_growth_observer", lambda d: 0)
+    monkeypatch.setattr(x_monitor, "wait_for_timeline_growth", lambda d, g: g + 1)
+    monkeypatch.setattr(x_monitor, "extract_visible_tweets",
+                        lambda d, *a, **kw: pages.pop(0) if pages else [])
+
+def test_old_tweet_on_top_does_not_end_the_poll(monkeypatch):
+    # 50 arriba (promocionado, ya visto), luego nuevos, luego la marca
+    timeline(monkeypatch, [[50, 120, 119], [118, 117], [100, 99, 98, 97, 96]])
+    n, newest, oldest, reached = x_monitor.poll_once(FakeDriver(), 100, None, limiter=NoWait())
+    assert (n, newest, oldest, reached) == (4, 120, 117, True)
+
+def test_gap_when_mark_never_reached(monkeypatch):
+    timeline(monkeypatch, [[130, 50], [129], [128]])
+    n, _, oldest, reached = x_monitor.poll_once(FakeDriver(), 100, None, max_rounds=2,
+                                                limiter=NoWait())
+    assert (n, oldest, reached) == (2, 129, False)
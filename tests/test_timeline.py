@@ -0,0 +1,94 @@
+"""Parser de x_timeline sobre respuestas grabadas (tests/fixtures), sin red."""
+import json, os
+
+import pytest
+
+from x_timeline import parse_search_timeline, parse_tweet_detail, response_errors
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+
+def load(name):
+    with open(os.path.join(FIXTURES, name), "r", encoding="utf-8") as f:
+        return json.load(f)
+
+@pytest.fixture
+def page1():
+    rows, cursor = parse_search_timeline(load("search_timeline_page1.json"))
+    return {r["tweet_id"]: r for r in rows}, cursor
+
+def test_page_rows_and_bottom_cursor(page1):
+    by_id, cursor = page1
+    # el tombstone (sin legacy) no da fila; el cursor superior se ignora
+    assert list(by_id) == ["1928801685054345407", "1928801000000000001",
+                           "1928800500000000002", "1928800100000000004"]
+    assert cursor == "DAADDAABCgABGsSu0VbXMAAKAAIaxKvBbBdgAQ"
+
+def test_basic_fields(page1):
+    r = page1[0]["1928801685054345407"]
+    assert r["handle"] == "@primicias"
+    assert r["display_name"] == "Primicias"
+    assert r["permalink"] == "https://x.com/primicias/status/1928801685054345407"
+    assert r["timestamp"] == "2025-05-31T13:12:11.000Z"
+    assert (r["replies"], r["retweets"], r["likes"], r["quotes"], r["views"]) == (12, 40, 210, 3, 15230)
+    assert r["urls"] == ["https://www.primicias.ec/politica/paro-nacional-gremios/"]
+    # extended_entities manda sobre entities (trae todas las fotos)
+    assert [m["url"] for m in r["media"]] == ["https://pbs.twimg.com/media/GsA1b2C3.jpg",
+                                              "https://pbs.twimg.com/media/GsA1b2C4.jpg"]
+    assert r["in_reply_to_id"] is None and r["quoted_id"] is None and r["reply_to"] == []
+
+def test_tweet_with_visibility_results(page1):
+    r = page1[0]["1928801000000000001"]
+    # usuario en formato legacy (antes del cambio a core) y sin conteo de vistas
+    assert r["handle"] == "@limitada_ec"
+    assert r["display_name"] == "Cuenta Limitada"
+    assert r["text"] == "Respuestas limitadas en este tweet"
+    # sin views.count: desconocido (None), no 0, para no pisar un conteo conocido
+    assert r["views"] is None
+
+def test_note_tweet_and_quote(page1):
+    r = page1[0]["1928800500000000002"]
+    # texto completo del note_tweet, no el full_text truncado con "…"
+    assert r["text"].endswith("Más en https://t.co/LoNg01")
+    assert "…" not in r["text"]
+    assert r["quoted_id"] == "1928700000000000003"
+    assert r["urls"] == ["https://twitter.com/primicias/status/1928700000000000003",
+                         "https://www.elcomercio.com/actualidad/paro-analisis/"]
+
+def test_reply_and_video(page1):
+    r = page1[0]["1928800100000000004"]
+    assert r["in_reply_to_id"] == "1928801685054345407"
+    assert r["reply_to"] == ["@primicias"]
+    # variante mp4 de mayor bitrate, no el m3u8 ni la miniatura
+    assert r["media"] == [{"type": "video",
+                           "url": "https://video.twimg.com/amplify_video/1/vid/720x1280/high.mp4"}]
+
+def test_replace_entry_cursor():
+    rows, cursor = parse_search_timeline(load("search_timeline_page2.json"))
+    assert [r["tweet_id"] for r in rows] == ["1928798000000000006"]
+    assert cursor == "DAADDAABCgABGsSu0VbXMAAKAAIaxKrhBhdgAQ"
+
+def test_end_of_timeline_repeats_cursor():
+    _, prev = parse_search_timeline(load("search_timeline_page2.json"))
+    rows, cursor = parse_search_timeline(load("search_timeline_end.json"))
+    assert rows == []
+    assert cursor == prev
+
+@pytest.mark.parametrize("payload", [{}, None, {"data": {}}, load("search_timeline_errors.json")])
+def test_empty_and_error_payloads(payload):
+    assert parse_search_timeline(payload) == ([], None)
+
+def test_response_errors():
+    assert response_errors(load("search_timeline_errors.json")) == ["Over capacity"]
+    assert response_errors(load("search_timeline_page1.json")) == []
+    assert response_errors(None) == []
+
+def test_tweet_detail():
+    rows, cursor = parse_tweet_detail(load("tweet_detail.json"))
+    focal, reply = rows
+    assert focal["tweet_id"] == "1928801685054345407"
+    assert (focal["replies"], focal["likes"], focal["views"]) == (57, 904, 48210)
+    # respuesta dentro de un módulo de conversación
+    assert reply["handle"] == "@lector_gye"
+    assert reply["in_reply_to_id"] == "1928801685054345407"
+    # en TweetDetail el cursor viene en itemContent
+    assert cursor.startswith("PAAAAPAtPBwc")
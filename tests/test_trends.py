@@ -0,0 +1,47 @@
+"""TrendStore no cuenta dos veces un tweet que llega en varios lotes."""
+import pytest
+
+pd = pytest.importorskip("pandas")
+
+from narrativa_emergente import TrendStore, TZ_EC
+
+def batch(ids, text="hola #Paro"):
+    return pd.DataFrame({"tweet_id": ids, "text": [text] * len(ids),
+                         "ts_ec": pd.Timestamp("2025-05-31 10:00", tz=TZ_EC)})
+
+def paro(store):
+    c = store.counts["day"]
+    return int(c.loc[c["hashtag"] == "#paro", "freq"].sum())
+
+def test_overlapping_batches(tmp_path):
+    store = TrendStore(str(tmp_path))
+    assert store.ingest(batch([1, 2]), source="a.ndjson") == 2
+    assert store.ingest(batch([2, 3]), source="b.ndjson") == 1
+    assert paro(store) == 3
+    store.save()
+    store.close()
+    # el índice persiste junto a las tablas
+    store = TrendStore(str(tmp_path))
+    assert store.ingest(batch([3]), source="c.ndjson") == 0
+    assert paro(store) == 3
+    store.close()
+
+def test_permalink_matches_tweet_id(tmp_path):
+    store = TrendStore(str(tmp_path))
+    store.ingest(pd.DataFrame({"permalink": ["https://x.com/a/status/7"], "text": ["#paro"],
+                               "ts_ec": pd.Timestamp("2025-05-31", tz=TZ_EC)}))
+    assert store.ingest(batch([7])) == 0
+    store.close()
+
+def test_unsaved_batch_is_forgotten(tmp_path):
+    store = TrendStore(str(tmp_path))
+    store.ingest(batch([1]))
+    store.close()
+    store = TrendStore(str(tmp_path))
+    assert store.ingest(batch([1])) == 1
+    store.close()
+
+def test_hashtag_once_per_tweet():
+    from narrativa_emergente import hashtag_counts
+    df = batch([1, 2], text="#Paro y #paro #PARO")
+    assert hashtag_counts(df, "D")["freq"].tolist() == [2]
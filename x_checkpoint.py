@@ -0,0 +1,102 @@
+"""Checkpoints por búsqueda para reanudar una corrida que murió a medias.
+
+Guarda en checkpoints/<query>.json las claves ya vistas (las mismas de
+dedup_merge; si el índice vive en disco, en x_seen/, solo cuántas van), el
+timestamp más antiguo alcanzado y el NDJSON donde se iba escribiendo. Al
+reanudar, la búsqueda se acota con `until:` al segundo del tweet más
+antiguo alcanzado, así X no vuelve a servir desde arriba lo que ya se
+recorrió.
+"""
+import json, os, re, time
+from datetime import datetime, timedelta
+
+CHECKPOINT_DIR      = "checkpoints"
+CHECKPOINT_INTERVAL = 15.0    # segundos mínimos entre escrituras del checkpoint
+
+class Checkpoint:
+    def __init__(self, query, directory=CHECKPOINT_DIR):
+        from x_crapy_json import query_slug   # x_crapy_json importa este módulo
+        self.query = query
+        # mismo slug que las salidas y el índice de x_seen/ de la búsqueda
+        self.path = os.path.join(directory, query_slug(query) + ".json")
+        self.seen = []
+        self.count = 0
+        self.oldest_ts = None
+        self.ndjson_path = None
+        self._last_save = 0.0
+
+    @classmethod
+    def load(cls, query, directory=CHECKPOINT_DIR):
+        cp = cls(query, directory)
+        if os.path.exists(cp.path):
+            with open(cp.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            cp.seen = data.get("seen", [])
+            cp.count = data.get("count", len(cp.seen))
+            cp.oldest_ts = data.get("oldest_ts")
+            cp.ndjson_path = data.get("ndjson_path")
+        return cp
+
+    @property
+    def resuming(self):
+        return bool(self.seen or self.count or self.oldest_ts)
+
+    def seen_index(self, index=None):
+        """Carga las claves ya vistas en `index` (dict o índice de x_dedup)."""
+        if index is None:
+            index = {}
+        if hasattr(index, "resume"):
+            # índice en disco: las claves ya están en su archivo, falta el conteo
+            index.resume(self.count)
+            return index
+        for key in self.seen:
+            if isinstance(index, dict):
+                index[key] = True
+            else:
+                index.add(key)
+        return index
+
+    def resume_query(self):
+        """Query acotada con until: al tweet más antiguo alcanzado, con
+        precisión de segundos (until: es exclusivo: +1 s para no perder los
+        de ese mismo segundo; el repetido lo descarta el índice)."""
+        from x_shards import format_bound
+        if not self.oldest_ts:
+            return self.query
+        oldest = datetime.fromisoformat(self.oldest_ts.replace("Z", "+00:00"))
+        until = oldest.replace(microsecond=0) + timedelta(seconds=1)
+        base = re.sub(r"\s*\buntil:\S+", "", self.query).strip()
+        return f"{base} until:{format_bound(until)}"
+
+    def observe(self, rows):
+        for r in rows:
+            ts = r.get("timestamp")
+            if ts and (self.oldest_ts is None or ts < self.oldest_ts):
+                self.oldest_ts = ts
+
+    def save(self, by_key):
+        if hasattr(by_key, "flush"):
+            by_key.flush()
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        data = {
+            "query": self.query,
+            "updated_at": datetime.now().isoformat(),
+            "oldest_ts": self.oldest_ts,
+            "ndjson_path": self.ndjson_path,
+            "count": len(by_key),
+            # Los índices en disco (sqlite/bloom) se persisten solos
+            "seen": list(by_key) if hasattr(by_key, "__iter__") else [],
+        }
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp, self.path)  # atómico: nunca queda un checkpoint a medias
+        self._last_save = time.monotonic()
+
+    def maybe_save(self, by_key, interval=CHECKPOINT_INTERVAL):
+        if time.monotonic() - self._last_save >= interval:
+            self.save(by_key)
+
+    def clear(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
@@ -1,5 +1,6 @@
-import json, os, time, re, csv
+import argparse, json, os, time, re, csv
 from datetime import datetime
+from itertools import islice
 from urllib.parse import quote
 from selenium import webdriver
 from selenium.webdriver.common.by import By
@@ -9,8 +10,16 @@ from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from webdriver_manager.chrome import ChromeDriverManager
+from x_timeline import parse_search_timeline, response_errors
+from x_sinks import StreamSink, compact_ndjson, iter_ndjson, CSV_FIELDS
+from x_checkpoint import Checkpoint
+from x_dedup import index_for, make_dedup_index, row_key
+from x_parquet import ParquetSink
+from x_store import StoreSink
+from x_metrics import METRICS
 from selenium.common.exceptions import (
-    TimeoutException, NoSuchElementException, StaleElementReferenceException
+    TimeoutException, NoSuchElementException, StaleElementReferenceException,
+    WebDriverException
 )
 
 # ===================== Config =====================
@@ -24,40 +33,146 @@ QUERY         = " ".join(KEYWORDS) + f" lang:{LANG}"
 MAX_TWEETS    = 500                   # <= controla cuántos tweets extraer
 HEADLESS      = True                 # True en servidores
 SAVE_CSV      = True                 # True si también quieres CSV
-SCROLL_PAUSES = (1.5, 2.2)            # min/max pausa entre scrolls
+STREAM_OUTPUT = True                 # anexar cada lote a NDJSON/CSV mientras se scrollea
+COMPACT_JSON  = True                 # al final, compactar el NDJSON al JSON de siempre
+CHECKPOINTS   = True                 # reanudar corridas caídas (requiere STREAM_OUTPUT)
+PARQUET_OUTPUT = False               # además, dataset Parquet por query/fecha (requiere pyarrow)
+STORE_OUTPUT  = False                # además, upsert en la base SQLite de x_store (x_tweets.sqlite)
+DEDUP_INDEX   = "ids"                # "dict" | "ids" | "sqlite" | "bloom" (ver x_dedup; requiere STREAM_OUTPUT)
+SCROLL_MIN_INTERVAL = 0.6             # segundos mínimos entre scrolls (límite de ritmo)
+SCROLL_JITTER = 0.4                   # jitter aleatorio añadido al intervalo mínimo
+GROWTH_TIMEOUT = 8.0                  # espera máx. a que la timeline crezca tras un scroll
+MAX_IDLE_ROUNDS = 3                   # rondas seguidas sin crecer = fin de la timeline
 MAX_SCROLL_ROUNDS = 300               # tope de rondas de scroll por seguridad
+BACKOFF_BASE  = 5.0                   # primera espera tras un error/límite de X (se duplica)
+BACKOFF_MAX   = 300.0                 # espera máxima entre reintentos
+MAX_BACKOFFS  = 5                     # esperas seguidas sin contenido antes de rendirse
+EXTRACT_MODE  = "js"                  # "js" = un solo execute_script; "dom" = por elemento
+CAPTURE_MODE  = "dom"                 # "dom" = artículos renderizados; "network" = JSON SearchTimeline
+PROFILE_DIR   = None                  # p. ej. "x_profile": perfil de Chrome persistente (sesión + caché)
+BLOCK_MEDIA   = True                  # no descargar imágenes/video/fuentes
+METRICS_FILE  = "x_metrics.jsonl"    # métricas JSON-lines por ronda + resumen (None = desactivar)
+METRICS_PORT  = None                  # p. ej. 9108: /metrics en texto Prometheus
+CHROMEDRIVER_VERSION = None           # fijar versión de chromedriver (None = la que toque)
+DRIVER_CACHE  = ".chromedriver.json"  # ruta de chromedriver ya resuelta
+DRIVER_CACHE_TTL_DAYS = 7             # re-resolver chromedriver pasado este plazo
 # ==================================================
 
-def build_driver(headless=False):
+# Recursos que no aportan nada al scraping (solo se bloquean con BLOCK_MEDIA)
+BLOCKED_URL_PATTERNS = [
+    "*.mp4", "*.m3u8", "*.m4s", "*.woff", "*.woff2", "*.ttf",
+    "*video.twimg.com*", "*pbs.twimg.com/media/*", "*pbs.twimg.com/amplify_video_thumb/*",
+]
+
+_driver_path = None
+
+def resolve_driver_path():
+    """Ruta de chromedriver sin repetir la resolución de versión en cada arranque.
+
+    Orden: env CHROMEDRIVER_PATH, caché en memoria, caché en disco
+    (DRIVER_CACHE, válida DRIVER_CACHE_TTL_DAYS) y por último
+    ChromeDriverManager (fijado a CHROMEDRIVER_VERSION si se indica)."""
+    global _driver_path
+    env = os.environ.get("CHROMEDRIVER_PATH")
+    if env:
+        return env
+    if _driver_path:
+        return _driver_path
+    try:
+        with open(DRIVER_CACHE, "r", encoding="utf-8") as f:
+            cached = json.load(f)
+        fresh = time.time() - cached["resolved_at"] < DRIVER_CACHE_TTL_DAYS * 86400
+        if (fresh and os.path.exists(cached["path"])
+                and cached.get("version") == CHROMEDRIVER_VERSION):
+            _driver_path = cached["path"]
+            return _driver_path
+    except (OSError, ValueError, KeyError):
+        pass
+    _driver_path = ChromeDriverManager(driver_version=CHROMEDRIVER_VERSION).install()
+    try:
+        with open(DRIVER_CACHE, "w", encoding="utf-8") as f:
+            json.dump({"path": _driver_path, "version": CHROMEDRIVER_VERSION,
+                       "resolved_at": time.time()}, f)
+    except OSError:
+        pass
+    return _driver_path
+
+def build_driver(headless=False, capture_network=False, driver_path=None,
+                 profile_dir=None, block_media=None, extra_args=()):
+    """Chrome listo para X; `extra_args` son flags de línea de comandos adicionales."""
+    profile_dir = PROFILE_DIR if profile_dir is None else profile_dir
+    block_media = BLOCK_MEDIA if block_media is None else block_media
     opts = Options()
+    if capture_network:
+        # Logs de performance = eventos CDP Network.* para leer SearchTimeline
+        opts.set_capability("goog:loggingPrefs", {"performance": "ALL"})
     if headless:
         opts.add_argument("--headless=new")
     # Forzar idioma a inglés para aria-labels consistentes
     opts.add_argument("--lang=en-US")
-    opts.add_experimental_option("prefs", {"intl.accept_languages": "en,en_US"})
+    prefs = {"intl.accept_languages": "en,en_US"}
+    if block_media:
+        prefs["profile.managed_default_content_settings.images"] = 2
+    opts.add_experimental_option("prefs", prefs)
+    if profile_dir:
+        # Perfil persistente: sesión, caché HTTP y service worker de X ya calientes.
+        # Un perfil no puede abrirse en dos Chrome a la vez (el pool usa cookies).
+        opts.add_argument(f"--user-data-dir={os.path.abspath(profile_dir)}")
     # Hardening básico
     opts.add_argument("--disable-blink-features=AutomationControlled")
     opts.add_argument("--no-sandbox")
     opts.add_argument("--disable-dev-shm-usage")
     opts.add_argument("--window-size=1280,1000")
+    for arg in extra_args:
+        opts.add_argument(arg)
     opts.add_argument(
         "user-agent=Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15) "
         "AppleWebKit/537.36 (KHTML, like Gecko) "
         "Chrome/126.0.0.0 Safari/537.36"
     )
-    service = Service(ChromeDriverManager().install())
-    return webdriver.Chrome(service=service, options=opts)
+    with METRICS.stage("build_driver"):
+        service = Service(driver_path or resolve_driver_path())
+        driver = webdriver.Chrome(service=service, options=opts)
+    METRICS.instrument_driver(driver)
+    if block_media:
+        try:
+            driver.execute_cdp_cmd("Network.enable", {})
+            driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": BLOCKED_URL_PATTERNS})
+        except WebDriverException:
+            pass
+    return driver
 
 def save_cookies(driver, path=COOKIES_FILE):
     cookies = driver.get_cookies()
     with open(path, "w", encoding="utf-8") as f:
         json.dump(cookies, f, ensure_ascii=False, indent=2)
 
+def _cdp_cookie(c, domain):
+    cookie = {
+        "name": c["name"], "value": c["value"],
+        "domain": c["domain"] if c.get("domain", "").endswith("x.com") else domain,
+        "path": c.get("path", "/"),
+        "secure": c.get("secure", True),
+        "httpOnly": c.get("httpOnly", False),
+    }
+    if c.get("expiry"):
+        cookie["expires"] = c["expiry"]
+    if c.get("sameSite") in ("Strict", "Lax", "None"):
+        cookie["sameSite"] = c["sameSite"]
+    return cookie
+
 def load_cookies(driver, path=COOKIES_FILE, domain=".x.com"):
     if not os.path.exists(path):
         return False
     with open(path, "r", encoding="utf-8") as f:
         cookies = json.load(f)
+    # Vía CDP las cookies se inyectan sin navegar antes a x.com
+    try:
+        driver.execute_cdp_cmd("Network.setCookies",
+                               {"cookies": [_cdp_cookie(c, domain) for c in cookies]})
+        return True
+    except (WebDriverException, KeyError):
+        pass
     driver.get("https://x.com/")
     for c in cookies:
         if "domain" in c and not c["domain"].endswith("x.com"):
@@ -90,8 +205,8 @@ def login_once_and_cache(driver):
     except TimeoutException:
         raise RuntimeError("(BAD) No se detectó inicio de sesión en el tiempo esperado.")
 
-def go_to_search(driver, query, timeout=60):
-    url = f"https://x.com/search?q={quote(query)}&src=typed_query&f=live"
+def go_to_search(driver, query, timeout=60, base_url="https://x.com"):
+    url = f"{base_url}/search?q={quote(query)}&src=typed_query&f=live"
     driver.get(url)
     # Intenta cerrar diálogos (consent)
     try:
@@ -144,13 +259,192 @@ def human_pause(a=1.2, b=2.0):
     import random
     time.sleep(random.uniform(a, b))
 
+class RateLimiter:
+    """Garantiza un intervalo mínimo (más jitter) entre acciones.
+
+    A diferencia de human_pause, solo duerme el tiempo que falta desde la
+    última llamada: si la espera de contenido ya consumió el intervalo, no
+    añade nada."""
+
+    def __init__(self, min_interval=SCROLL_MIN_INTERVAL, jitter=SCROLL_JITTER):
+        self.min_interval = min_interval
+        self.jitter = jitter
+        self._last = 0.0
+
+    def wait(self):
+        import random
+        target = self._last + self.min_interval + random.uniform(0, self.jitter)
+        now = time.monotonic()
+        if target > now:
+            time.sleep(target - now)
+        self._last = time.monotonic()
+
+# MutationObserver que cuenta artículos añadidos a la timeline. Se cuenta
+# lo añadido (no los montados) porque X virtualiza la lista y desmonta los
+# de arriba al bajar.
+INSTALL_GROWTH_OBSERVER_JS = r"""
+if (!window.__xGrowthObserver) {
+  window.__xGrowth = 0;
+  const sel = 'article[data-testid="tweet"]';
+  window.__xGrowthObserver = new MutationObserver(muts => {
+    for (const m of muts) for (const n of m.addedNodes) {
+      if (n.nodeType !== 1) continue;
+      if (n.matches(sel) || n.querySelector(sel)) window.__xGrowth++;
+    }
+  });
+  window.__xGrowthObserver.observe(document.body, {childList: true, subtree: true});
+}
+return window.__xGrowth;
+"""
+
+# Espera (en la página, una sola llamada WebDriver) a que el contador
+# supere el valor dado o a que venza el timeout.
+WAIT_GROWTH_JS = r"""
+const last = arguments[0], timeoutMs = arguments[1];
+const done = arguments[arguments.length - 1];
+const t0 = Date.now();
+(function check() {
+  const g = window.__xGrowth || 0;
+  if (g > last || Date.now() - t0 >= timeoutMs) return done(g);
+  setTimeout(check, 50);
+})();
+"""
+
+def install_growth_observer(driver):
+    return driver.execute_script(INSTALL_GROWTH_OBSERVER_JS) or 0
+
+def wait_for_timeline_growth(driver, last, timeout=GROWTH_TIMEOUT):
+    """Devuelve el nuevo valor del contador; igual a `last` si no creció."""
+    driver.set_script_timeout(timeout + 5)
+    try:
+        return driver.execute_async_script(WAIT_GROWTH_JS, last, int(timeout * 1000))
+    except TimeoutException:
+        return last
+
 def parse_int_from_text(text):
     m = re.search(r'(\d[\d,\.]*)', text or "")
     if not m:
         return 0
     return int(m.group(1).replace(",", "").replace(".", ""))
 
-def extract_visible_tweets(driver):
+# Datos extra de un artículo, leídos del mismo nodo (sin abrir el permalink):
+# URLs expandidas (el texto completo del enlace t.co está en spans ocultos),
+# fotos/videos, tweet citado, cuentas a las que responde y vistas. Todo lo
+# que está dentro de la tarjeta del tweet citado (div[role="link"]) se
+# excluye para no mezclarlo con el tweet principal.
+TWEET_EXTRAS_JS = r"""
+function tweetExtras(art, permalink) {
+  const own = ((permalink || "").match(/\/status\/(\d+)/) || [])[1] || null;
+  const quote = art.querySelector('div[role="link"]');
+  const inQuote = el => !!quote && quote.contains(el);
+  const urls = [];
+  for (const a of art.querySelectorAll('div[data-testid="tweetText"] a[href*="t.co/"], div[data-testid="card.wrapper"] a[href*="t.co/"]')) {
+    if (inQuote(a)) continue;
+    let u = (a.textContent || "").replace(/\u2026$/, "").trim();
+    if (!/^https?:\/\//.test(u)) u = a.href;   // tarjetas: solo queda el t.co
+    if (!urls.includes(u)) urls.push(u);
+  }
+  const media = [], seenMedia = new Set();
+  const addMedia = (type, url) => {
+    if (url && !seenMedia.has(url)) { seenMedia.add(url); media.push({type: type, url: url}); }
+  };
+  for (const img of art.querySelectorAll('div[data-testid="tweetPhoto"] img')) {
+    if (!inQuote(img)) addMedia("photo", img.getAttribute("src"));
+  }
+  for (const v of art.querySelectorAll('div[data-testid="videoPlayer"] video, div[data-testid="videoComponent"] video')) {
+    if (inQuote(v)) continue;
+    const url = v.getAttribute("poster") || v.getAttribute("src");
+    addMedia(/tweet_video/.test(url || "") ? "animated_gif" : "video", url);
+  }
+  let quoted = null;
+  if (quote) {
+    for (const a of quote.querySelectorAll('a[href*="/status/"]')) {
+      const m = (a.getAttribute("href") || "").match(/\/status\/(\d+)/);
+      if (m && m[1] !== own) { quoted = m[1]; break; }
+    }
+  }
+  const userBox = art.querySelector('div[data-testid="User-Name"]');
+  const replyTo = [];
+  for (const a of art.querySelectorAll('a[href^="/"], a[href^="https://x.com/"]')) {
+    if ((userBox && userBox.contains(a)) || inQuote(a) || a.closest('div[data-testid="tweetText"]')) continue;
+    const t = (a.textContent || "").trim();
+    if (/^@\w+$/.test(t) && !replyTo.includes(t)) replyTo.push(t);
+  }
+  const an = art.querySelector('a[href$="/analytics"]');
+  return {views: an ? (an.getAttribute("aria-label") || "") : null,
+          urls: urls, media: media, quoted_id: quoted, reply_to: replyTo};
+}
+"""
+
+# Extrae todos los artículos visibles en una sola llamada a WebDriver.
+# Devuelve las aria-labels crudas; el parseo numérico se hace en Python
+# con parse_int_from_text para que ambos modos den exactamente lo mismo.
+EXTRACT_TWEETS_JS = TWEET_EXTRAS_JS + r"""
+const out = [];
+for (const art of document.querySelectorAll('article[data-testid="tweet"]')) {
+  const userBox = art.querySelector('div[data-testid="User-Name"]');
+  if (!userBox) continue;
+  const nameSpan = userBox.querySelector('span');
+  if (!nameSpan) continue;
+  const spans = art.querySelectorAll('div[data-testid="tweetText"] span');
+  const text = Array.from(spans, s => s.innerText).join(" ");
+  let handle = "";
+  for (const a of userBox.querySelectorAll('a')) {
+    const href = a.href || "";
+    if (!href.includes("/status/") && href.startsWith("https://x.com/")) {
+      handle = "@" + href.split("/").pop();
+      break;
+    }
+  }
+  let ts = null, permalink = null;
+  const t = art.querySelector('time');
+  if (t) {
+    ts = t.getAttribute('datetime');
+    const p = t.parentElement;
+    permalink = (p && p.tagName === 'A') ? p.href : null;
+  }
+  const aria = id => {
+    const el = art.querySelector('div[data-testid="' + id + '"]');
+    return el ? (el.getAttribute('aria-label') || "") : null;
+  };
+  out.push(Object.assign({
+    display_name: nameSpan.innerText, handle: handle, text: text,
+    timestamp: ts, permalink: permalink,
+    replies: aria("reply"), retweets: aria("retweet"), likes: aria("like")
+  }, tweetExtras(art, permalink)));
+}
+return out;
+"""
+
+# Modo "dom": los extras se leen con una llamada por artículo
+ARTICLE_EXTRAS_JS = TWEET_EXTRAS_JS + "return tweetExtras(arguments[0], arguments[1]);"
+
+def _views(aria):
+    # Sin enlace de analytics (tweets viejos, otros idiomas de UI) = desconocido, no 0
+    return parse_int_from_text(aria) if aria is not None else None
+
+def extract_visible_tweets(driver, mode=None):
+    """Extrae los tweets visibles. Por defecto en una sola ida y vuelta
+    (EXTRACT_MODE="js"); si el script falla, cae al modo por elemento."""
+    mode = mode or EXTRACT_MODE
+    if mode == "js":
+        try:
+            return extract_visible_tweets_js(driver)
+        except WebDriverException:
+            METRICS.incr("js_extract_fallback")
+    return extract_visible_tweets_dom(driver)
+
+def extract_visible_tweets_js(driver):
+    raw = driver.execute_script(EXTRACT_TWEETS_JS) or []
+    tweets = []
+    for r in raw:
+        for k in ("replies", "retweets", "likes"):
+            r[k] = parse_int_from_text(r.get(k))
+        r["views"] = _views(r.get("views"))
+        tweets.append(r)
+    return tweets
+
+def extract_visible_tweets_dom(driver):
     tweets = []
     articles = driver.find_elements(By.CSS_SELECTOR, 'article[data-testid="tweet"]')
     for art in articles:
@@ -190,6 +484,9 @@ def extract_visible_tweets(driver):
             retweets = metric("retweet")
             likes    = metric("like")
 
+            # Medios, enlaces, cita, respuesta y vistas
+            extras = driver.execute_script(ARTICLE_EXTRAS_JS, art, permalink) or {}
+
             tweets.append({
                 "display_name": display_name,
                 "handle": handle,
@@ -199,35 +496,325 @@ def extract_visible_tweets(driver):
                 "replies": replies,
                 "retweets": retweets,
                 "likes": likes,
+                "views": _views(extras.get("views")),
+                "urls": extras.get("urls") or [],
+                "media": extras.get("media") or [],
+                "quoted_id": extras.get("quoted_id"),
+                "reply_to": extras.get("reply_to") or [],
             })
-        except (NoSuchElementException, StaleElementReferenceException):
+        except NoSuchElementException:
+            METRICS.incr("missing_elements")
+            continue
+        except StaleElementReferenceException:
+            METRICS.incr("stale_elements")
             continue
     return tweets
 
-def dedup_merge(existing_by_key, new_rows):
-    added = 0
+class TimelineCapture:
+    """Lee las respuestas GraphQL SearchTimeline que la página ya descargó.
+
+    Recorre los logs de performance (eventos CDP) y, cuando una respuesta
+    de SearchTimeline termina de cargar, pide su cuerpo con
+    Network.getResponseBody y la parsea con x_timeline. Requiere un driver
+    creado con build_driver(capture_network=True)."""
+
+    def __init__(self, url_marker="SearchTimeline", on_payload=None,
+                 parse=parse_search_timeline):
+        self.url_marker = url_marker
+        self.parse = parse             # p. ej. x_timeline.parse_tweet_detail con "TweetDetail"
+        self.on_payload = on_payload   # callback con el JSON crudo (p. ej. para grabarlo)
+        self.pending = set()
+        self.cursor = None
+        self.responses = 0
+        self.exhausted = False
+        self.errors = 0                # respuestas sin timeline (200 con "errors" o vacías)
+        self.rate_limited = 0          # respuestas 429
+        self.rate_limit_reset = None   # epoch en que X dice que se libera el límite
+
+    def poll(self, driver):
+        rows = []
+        try:
+            entries = driver.get_log("performance")
+        except WebDriverException:
+            return rows
+        for entry in entries:
+            try:
+                msg = json.loads(entry["message"])["message"]
+            except (KeyError, ValueError):
+                continue
+            method = msg.get("method")
+            params = msg.get("params") or {}
+            if method == "Network.responseReceived":
+                response = params.get("response") or {}
+                if self.url_marker not in response.get("url", ""):
+                    continue
+                if response.get("status") == 429:
+                    self.rate_limited += 1
+                    headers = {k.lower(): v for k, v in (response.get("headers") or {}).items()}
+                    reset = headers.get("x-rate-limit-reset")
+                    self.rate_limit_reset = int(reset) if str(reset).isdigit() else None
+                    continue
+                self.pending.add(params.get("requestId"))
+            elif method == "Network.loadingFinished":
+                req_id = params.get("requestId")
+                if req_id in self.pending:
+                    self.pending.discard(req_id)
+                    rows.extend(self._read(driver, req_id))
+        return rows
+
+    def _read(self, driver, req_id):
+        try:
+            body = driver.execute_cdp_cmd("Network.getResponseBody", {"requestId": req_id})
+            payload = json.loads(body.get("body") or "{}")
+        except (WebDriverException, ValueError):
+            METRICS.incr("capture_body_errors")
+            return []
+        if self.on_payload is not None:
+            self.on_payload(payload)
+        self.responses += 1
+        rows, cursor = self.parse(payload)
+        if not rows and cursor is None:
+            # Sin timeline (p. ej. 200 con {"errors": [...]}): no es el final,
+            # ScrollController lo trata como un error y espera
+            self.errors += 1
+            METRICS.incr("capture_payload_errors")
+            msgs = response_errors(payload)
+            if msgs:
+                print(f"  [!] {self.url_marker} con errores: {'; '.join(msgs)[:200]}")
+            return rows
+        # Fin de la timeline: página válida sin tweets que repite el cursor
+        if not rows and cursor == self.cursor:
+            self.exhausted = True
+        if cursor:
+            self.cursor = cursor
+        return rows
+
+def dedup_merge(existing_by_key, new_rows, sink=None, limit=None):
+    """Añade a existing_by_key las filas no vistas; devuelve cuántas.
+
+    existing_by_key es un dict (clave permalink) o un índice de x_dedup
+    (clave = ID entero; no guarda filas, así que requiere `sink`).
+    Con `sink`, las filas nuevas se escriben en él y en el índice solo
+    queda la clave (la fila se libera). `limit` corta al llegar a ese total."""
+    added = []
+    as_dict = isinstance(existing_by_key, dict)
     for r in new_rows:
-        key = r.get("permalink") or (r.get("handle","") + (r.get("text","")[:1000]))
-        if key not in existing_by_key:
-            existing_by_key[key] = r
-            added += 1
-    return added
+        if limit is not None and len(existing_by_key) >= limit:
+            break
+        if as_dict:
+            key = r.get("permalink") or (r.get("handle","") + (r.get("text","")[:1000]))
+            if key in existing_by_key:
+                continue
+            existing_by_key[key] = r if sink is None else True
+        elif not existing_by_key.add(row_key(r)):
+            continue
+        added.append(r)
+    if sink is not None and added:
+        sink.write(added)
+    return len(added)
+
+class TimelineStalled(WebDriverException):
+    """La timeline dejó de dar contenido por un muro de login o errores /
+    límites repetidos. Es un WebDriverException para que el pool (x_pool)
+    lo trate como una sesión caída: cierra el driver y reintenta en otra."""
+
+# Estado de la página en una sola llamada: muro de login y banner de error
+# ("Something went wrong" / "Algo salió mal"). Solo cuentan el botón
+# Reintentar y las celdas de la timeline que no son tweets: el texto de los
+# tweets (que puede decir "algo salió mal") no se mira. Si hay botón
+# Reintentar, se pulsa aquí mismo.
+TIMELINE_STATE_JS = r"""
+const login = /\/(login|i\/flow\/login)/.test(location.pathname)
+  || !!document.querySelector('[data-testid="loginButton"], [data-testid="login"]');
+const col = document.querySelector('[data-testid="primaryColumn"]') || document.body;
+let retry = null;
+for (const b of col.querySelectorAll('[role="button"], button')) {
+  if (b.closest('article')) continue;
+  if (/^\s*(Retry|Reintentar|Volver a intentarlo)\s*$/i.test(b.innerText || '')) { retry = b; break; }
+}
+let banner = false;
+if (!retry) {
+  for (const cell of col.querySelectorAll('[data-testid="cellInnerDiv"]')) {
+    if (cell.querySelector('article')) continue;
+    if (/Something went wrong|Algo salió mal/i.test(cell.innerText || '')) { banner = true; break; }
+  }
+}
+const error = !!retry || banner;
+if (retry) retry.click();
+return {login: login, error: error, clicked: !!retry};
+"""
+
+class ScrollController:
+    """Decide tras cada ronda: seguir, esperar (backoff) o terminar.
 
-def to_csv(rows, query):
+    - Ronda con tweets nuevos: reinicia el backoff.
+    - Banner de error, respuestas 429 o páginas sin timeline (200 con
+      "errors") en la captura: pulsa Reintentar y espera con backoff
+      exponencial (y jitter), o hasta el reset que indicó X; tras
+      MAX_BACKOFFS seguidas lanza TimelineStalled.
+    - Muro de login: TimelineStalled inmediato (no tiene arreglo scrolleando).
+    - Rondas sin crecer y sin error: la timeline se acabó, se termina ya."""
+
+    def __init__(self, base=BACKOFF_BASE, cap=BACKOFF_MAX, max_backoffs=MAX_BACKOFFS,
+                 max_idle=MAX_IDLE_ROUNDS):
+        self.base = base
+        self.cap = cap
+        self.max_backoffs = max_backoffs
+        self.max_idle = max_idle
+        self.backoffs = 0
+        self.idle = 0
+        self.deadline = None           # time.monotonic de la búsqueda: no esperar más allá
+        self._rate_limited = 0
+        self._errors = 0
+
+    def _delay(self, reset_at=None):
+        import random
+        delay = min(self.cap, self.base * 2 ** self.backoffs * random.uniform(0.5, 1.5))
+        if reset_at:
+            delay = max(delay, min(self.cap, reset_at - time.time()))
+        if self.deadline is not None:
+            delay = min(delay, max(0.0, self.deadline - time.monotonic()))
+        return delay
+
+    def after_round(self, driver, added, grew, capture=None):
+        """True = seguir scrolleando, False = fin de la timeline."""
+        if added:
+            self.backoffs = self.idle = 0
+            return True
+        limited = capture is not None and capture.rate_limited > self._rate_limited
+        failed = capture is not None and capture.errors > self._errors
+        if capture is not None:
+            self._rate_limited = capture.rate_limited
+            self._errors = capture.errors
+        state = {}
+        if not grew or limited:
+            # Solo se inspecciona la página cuando la ronda no rindió
+            try:
+                state = driver.execute_script(TIMELINE_STATE_JS) or {}
+            except WebDriverException:
+                state = {}
+        if state.get("login"):
+            METRICS.incr("login_wall")
+            raise TimelineStalled("Muro de login en medio de la búsqueda")
+        if state.get("error") or limited or failed:
+            if self.backoffs >= self.max_backoffs:
+                raise TimelineStalled(f"{self.backoffs} esperas seguidas sin contenido")
+            delay = self._delay(capture.rate_limit_reset if limited else None)
+            self.backoffs += 1
+            METRICS.incr("rate_limited" if limited else "error_banner" if state.get("error")
+                         else "error_payload")
+            if state.get("clicked"):
+                METRICS.incr("retry_clicks")
+            METRICS.emit("backoff", seconds=round(delay, 1), attempt=self.backoffs,
+                         rate_limited=limited)
+            print(f"  [!] {'Límite de X' if limited else 'Error en la timeline'}; "
+                  f"esperando {delay:.0f}s (intento {self.backoffs}/{self.max_backoffs})")
+            with METRICS.stage("backoff"):
+                time.sleep(delay)
+            self.idle = 0
+            return True
+        self.idle = 0 if grew else self.idle + 1
+        if self.idle >= self.max_idle:
+            print(f"  [=] {self.idle} rondas sin contenido nuevo: fin de la timeline.")
+            return False
+        return True
+
+def scrape_timeline(driver, by_key, max_tweets, capture=None,
+                    max_rounds=MAX_SCROLL_ROUNDS, limiter=None, deadline=None,
+                    sink=None, checkpoint=None, extract_mode=None, controller=None):
+    """Bucle de scroll adaptativo sobre una búsqueda ya cargada.
+
+    Tras cada scroll espera solo hasta que la timeline crece (observer en
+    la página) y sigue; termina al llegar a max_tweets, cuando el cursor
+    inferior indica el final o tras MAX_IDLE_ROUNDS rondas sin contenido.
+    `deadline` (time.monotonic) corta la búsqueda aunque no haya terminado.
+    Con `sink`, cada lote nuevo se escribe a disco al encontrarse; con
+    `checkpoint`, el progreso se persiste periódicamente. `controller`
+    (ScrollController) aplica backoff ante errores/límites de X y puede
+    lanzar TimelineStalled."""
+    limiter = limiter or RateLimiter()
+    controller = controller or ScrollController()
+    controller.deadline = deadline
+    growth = install_growth_observer(driver)
+    body = driver.find_element(By.TAG_NAME, "body")
+    rounds = 0
+
+    while len(by_key) < max_tweets and rounds < max_rounds:
+        new_rows = []
+        if capture:
+            with METRICS.stage("capture"):
+                new_rows = capture.poll(driver)
+        if not new_rows and not (capture and capture.responses):
+            # Modo "dom", o la captura aún no vio ningún JSON: leer el DOM
+            with METRICS.stage("extract"):
+                new_rows = extract_visible_tweets(driver, mode=extract_mode)
+        with METRICS.stage("dedup_write"):
+            added = dedup_merge(by_key, new_rows, sink=sink, limit=max_tweets)
+        METRICS.round(added, len(by_key), seen=len(new_rows))
+        if added:
+            print(f"  [+] Nuevos: {added} | Total: {len(by_key)}")
+        if checkpoint is not None:
+            checkpoint.observe(new_rows)
+            checkpoint.maybe_save(by_key)
+
+        if len(by_key) >= max_tweets:
+            break
+        if capture and capture.exhausted:
+            print("  [=] Cursor inferior sin más resultados: fin de la timeline.")
+            break
+        if deadline is not None and time.monotonic() >= deadline:
+            print("  [!] Tiempo máximo de la búsqueda agotado.")
+            break
+
+        with METRICS.stage("pacing"):
+            limiter.wait()
+        with METRICS.stage("scroll"):
+            body.send_keys(Keys.END)
+        with METRICS.stage("wait_growth"):
+            new_growth = wait_for_timeline_growth(driver, growth)
+        grew = new_growth > growth
+        growth = new_growth
+        rounds += 1
+        if not controller.after_round(driver, added, grew, capture):
+            break
+    return rounds
+
+def scrape_query(driver, query, max_tweets, capture_network=False, deadline=None,
+                 sink=None, limiter=None):
+    """Carga una búsqueda en un driver ya autenticado y devuelve sus filas
+    (vacío si se usó `sink`: las filas ya están en disco)."""
+    capture = None
+    if capture_network:
+        try:
+            driver.get_log("performance")  # descarta eventos de la búsqueda anterior
+        except WebDriverException:
+            pass
+        capture = TimelineCapture()
+    with METRICS.stage("go_to_search"):
+        go_to_search(driver, query, timeout=60)
+    by_key = {}
+    scrape_timeline(driver, by_key, max_tweets, capture=capture, deadline=deadline,
+                    sink=sink, limiter=limiter)
+    if sink is not None:
+        return []
+    return list(by_key.values())[:max_tweets]
+
+def query_slug(query):
+    return re.sub(r"[^\w]+", "_", query).strip("_")[:60] or "query"
+
+def to_csv(rows, query, prefix="x_tweets"):
     stamp = datetime.now().strftime("%Y%m%d_%H%M")
-    fn = f"x_tweets_{stamp}.csv"
+    fn = f"{prefix}_{stamp}.csv"
     with open(fn, "w", newline="", encoding="utf-8") as f:
-        w = csv.DictWriter(f, fieldnames=[
-            "display_name","handle","text","timestamp","permalink","replies","retweets","likes"
-        ])
+        w = csv.DictWriter(f, fieldnames=CSV_FIELDS, extrasaction="ignore")
         w.writeheader()
         for r in rows:
             w.writerow(r)
     return fn
 
-def to_json(rows, query):
+def to_json(rows, query, prefix="x_tweets"):
     stamp = datetime.now().strftime("%Y%m%d_%H%M")
-    fn = f"x_tweets_{stamp}.json"
+    fn = f"{prefix}_{stamp}.json"
     payload = {
         "query": query,
         "generated_at": datetime.now().isoformat(),
@@ -238,58 +825,260 @@ def to_json(rows, query):
         json.dump(payload, f, ensure_ascii=False, indent=2)
     return fn
 
-def main():
-    # Si no hay cookie de sesión, haz el primer login sin headless
+def load_batch(path, default_max=MAX_TWEETS, default_prefix="x_tweets"):
+    """Búsquedas de un archivo de lote.
+
+    YAML (requiere pyyaml) o JSON: una lista de búsquedas, o un dict con
+    "defaults" y "queries"; cada búsqueda es un string o un dict con
+    query, max y out_prefix. Cualquier otra extensión: una búsqueda por línea;
+    son comentario solo las líneas "#" o que empiezan por "# " (con espacio),
+    para no perder búsquedas de hashtag como "#ParoNacional lang:es"."""
+    with open(path, "r", encoding="utf-8") as f:
+        raw = f.read()
+    if path.endswith((".yaml", ".yml")):
+        try:
+            import yaml
+        except ImportError:
+            raise RuntimeError("(BAD) Los lotes YAML requieren pyyaml: pip install pyyaml")
+        data = yaml.safe_load(raw)
+    elif path.endswith(".json"):
+        data = json.loads(raw)
+    else:
+        data = [ln for ln in (ln.strip() for ln in raw.splitlines())
+                if ln and ln != "#" and not ln.startswith("# ")]
+    defaults = {"max": default_max}
+    if isinstance(data, dict):
+        defaults.update(data.get("defaults") or {})
+        data = data.get("queries") or []
+    jobs = []
+    for item in data:
+        job = dict(defaults)
+        job.update({"query": item} if isinstance(item, str) else item)
+        job.setdefault("out_prefix", default_prefix if len(data) == 1 else
+                       f"{default_prefix}_{query_slug(job['query'])}")
+        jobs.append(job)
+    return jobs
+
+def parse_args(argv=None):
+    ap = argparse.ArgumentParser(description="Extrae tweets de búsquedas de X (pestaña Latest).")
+    ap.add_argument("--query", default=QUERY, help="búsqueda (sintaxis de X)")
+    ap.add_argument("--max", type=int, default=MAX_TWEETS, help="tweets máx. por búsqueda")
+    ap.add_argument("--headless", action=argparse.BooleanOptionalAction, default=HEADLESS)
+    ap.add_argument("--json-only", action="store_true", help="no escribir CSV")
+    ap.add_argument("--out-prefix", default="x_tweets", help="prefijo de los archivos de salida")
+    ap.add_argument("--batch", help="YAML/JSON/txt con varias búsquedas y sus límites")
+    ap.add_argument("--workers", type=int, default=1,
+                    help="sesiones de Chrome en paralelo para --batch (1 = una sesión reutilizada)")
+    ap.add_argument("--network", action="store_true", default=CAPTURE_MODE == "network",
+                    help="leer el JSON SearchTimeline en vez del DOM")
+    ap.add_argument("--min-interval", type=float, default=SCROLL_MIN_INTERVAL,
+                    help="segundos mínimos entre scrolls")
+    ap.add_argument("--jitter", type=float, default=SCROLL_JITTER)
+    ap.add_argument("--parquet", action="store_true", default=PARQUET_OUTPUT,
+                    help="además, dataset Parquet (requiere pyarrow)")
+    ap.add_argument("--store", action="store_true", default=STORE_OUTPUT,
+                    help="además, upsert en la base SQLite de x_store")
+    return ap.parse_args(argv)
+
+def _open_session(headless, network):
+    """Driver autenticado; el primer login se hace con ventana."""
     need_login = not has_auth_cookie()
-    driver = build_driver(headless=(HEADLESS and not need_login))
+    driver = build_driver(headless=(headless and not need_login), capture_network=network)
+    if not load_cookies(driver) or need_login:
+        login_once_and_cache(driver)
+        if headless:
+            # reabrir en headless ya con cookies cargadas
+            driver.quit()
+            driver = build_driver(headless=True, capture_network=network)
+            load_cookies(driver)
+    return driver
+
+def run_job(driver, job, args, deadline=None):
+    """Una búsqueda sobre un driver ya autenticado, con sus propias salidas.
+
+    Devuelve la ruta de su salida principal (JSON, o NDJSON si no se
+    compacta), la que write_merged une al final de un lote."""
+    query, max_tweets, prefix = job["query"], job["max"], job["out_prefix"]
+    save_csv = SAVE_CSV and not args.json_only
     by_key = {}
+    capture = None
+    if args.network:
+        try:
+            driver.get_log("performance")  # descarta eventos de la búsqueda anterior
+        except WebDriverException:
+            pass
+        capture = TimelineCapture()
+    sink = checkpoint = None
+    search = query
+    if STREAM_OUTPUT:
+        by_key = index_for(DEDUP_INDEX, query_slug(query))
+        if CHECKPOINTS:
+            checkpoint = Checkpoint.load(query)
+            if checkpoint.resuming:
+                by_key = checkpoint.seen_index(by_key)
+                search = checkpoint.resume_query()
+                print(f"(RESUME) {len(by_key)} tweets ya vistos; continuando con '{search}'")
+        extra = []
+        if args.parquet:
+            extra.append(ParquetSink(query))
+        if args.store:
+            extra.append(StoreSink())
+        sink = StreamSink(prefix=prefix, csv_out=save_csv,
+                          ndjson_path=checkpoint.ndjson_path if checkpoint else None,
+                          extra=extra)
+        if checkpoint is not None:
+            checkpoint.ndjson_path = sink.ndjson_path
     try:
-        if not load_cookies(driver) or need_login:
-            login_once_and_cache(driver)
-            if HEADLESS:
-                # reabrir en headless ya con cookies cargadas
-                driver.quit()
-                driver = build_driver(headless=True)
-                load_cookies(driver)
-
-        go_to_search(driver, QUERY, timeout=60)
+        with METRICS.stage("go_to_search"):
+            go_to_search(driver, search, timeout=60)
 
         # Debug inicial: cuántos artículos visibles
         arts = driver.find_elements(By.CSS_SELECTOR, 'article[data-testid="tweet"]')
         print(f"[DEBUG] Artículos visibles tras cargar búsqueda: {len(arts)}")
 
-        print(f"(SEARCH) '{QUERY}' — extrayendo hasta {MAX_TWEETS} tweets…")
-        rounds = 0
-        body = driver.find_element(By.TAG_NAME, "body")
+        print(f"(SEARCH) '{search}' — extrayendo hasta {max_tweets} tweets…")
+        scrape_timeline(driver, by_key, max_tweets, capture=capture, sink=sink,
+                        checkpoint=checkpoint, deadline=deadline,
+                        limiter=RateLimiter(args.min_interval, args.jitter))
 
-        while len(by_key) < MAX_TWEETS and rounds < MAX_SCROLL_ROUNDS:
-            new_rows = extract_visible_tweets(driver)
-            added = dedup_merge(by_key, new_rows)
-            if added:
-                print(f"  [+] Nuevos: {added} | Total: {len(by_key)}")
+        if sink is not None:
+            sink.close()
+            if checkpoint is not None:
+                checkpoint.clear()  # corrida completa: la próxima empieza de cero
+            print(f"(OK) Tweets extraídos: {sink.count}")
+            print(f"(SAVE) NDJSON en: {sink.ndjson_path}")
+            if sink.csv_path:
+                print(f"(SAVE) CSV  en: {sink.csv_path}")
+            if not COMPACT_JSON:
+                return sink.ndjson_path
+            with METRICS.stage("serialize"):
+                json_path = compact_ndjson(sink.ndjson_path, query)
+            print(f"(SAVE) JSON en: {json_path}")
+            return json_path
+        rows = list(by_key.values())[:max_tweets]
+        print(f"(OK) Tweets extraídos: {len(rows)}")
+        return write_outputs(rows, query, prefix, save_csv, args.store, args.parquet)
+    finally:
+        if sink is not None and not sink.closed and checkpoint is not None:
+            checkpoint.save(by_key)
+            print(f"(CHECKPOINT) Progreso guardado en {checkpoint.path}")
+        if sink is not None:
+            sink.close()
+        if hasattr(by_key, "close"):
+            by_key.close()
 
-            if len(by_key) >= MAX_TWEETS:
-                break
+def write_outputs(rows, query, prefix, save_csv=SAVE_CSV, store=STORE_OUTPUT,
+                  parquet=PARQUET_OUTPUT):
+    """Salidas de una búsqueda sin STREAM_OUTPUT; devuelve la ruta del JSON."""
+    with METRICS.stage("serialize"):
+        json_path = to_json(rows, query, prefix=prefix)
+    print(f"(SAVE) JSON en: {json_path}")
+    if save_csv:
+        with METRICS.stage("serialize"):
+            csv_path = to_csv(rows, query, prefix=prefix)
+        print(f"(SAVE) CSV  en: {csv_path}")
+    if parquet:
+        sink_pq = ParquetSink(query)
+        sink_pq.write(rows)
+        sink_pq.close()
+        print(f"(SAVE) {len(rows)} tweets en Parquet ({sink_pq.root})")
+    if store:
+        with StoreSink() as sink_db:
+            sink_db.write(rows)
+        print(f"(SAVE) {len(rows)} tweets en la base SQLite de x_store")
+    return json_path
 
-            # Scroll una vez y pausa "humana"
-            body.send_keys(Keys.END)
-            human_pause(*SCROLL_PAUSES)
-            rounds += 1
+def _iter_output(path):
+    if path.endswith(".ndjson"):
+        return iter_ndjson(path)
+    with open(path, "r", encoding="utf-8") as f:
+        return iter(json.load(f).get("tweets", []))
 
-        rows = list(by_key.values())[:MAX_TWEETS]
-        print(f"(OK) Tweets extraídos: {len(rows)}")
+def write_merged(paths, label, save_csv=SAVE_CSV, chunk=5000):
+    """Une las salidas de un lote con deduplicación global en x_tweets_merged_*,
+    leyéndolas por bloques (no carga todo el lote en memoria)."""
+    seen = make_dedup_index("ids")
+    sink = StreamSink(prefix="x_tweets_merged", csv_out=save_csv)
+    try:
+        for path in paths:
+            rows = _iter_output(path)
+            while True:
+                block = list(islice(rows, chunk))
+                if not block:
+                    break
+                dedup_merge(seen, block, sink=sink)
+    finally:
+        sink.close()
+    print(f"(OK) Total deduplicado del lote: {sink.count}")
+    if not COMPACT_JSON:
+        print(f"(SAVE) NDJSON en: {sink.ndjson_path}")
+        return sink.ndjson_path
+    json_path = compact_ndjson(sink.ndjson_path, label)
+    print(f"(SAVE) JSON en: {json_path}")
+    return json_path
+
+def run_pooled(jobs, args):
+    """Lote repartido entre varias sesiones (x_pool). Cada búsqueda pasa por
+    run_job, con las mismas salidas, sinks y checkpoints que en una sola
+    sesión (un reintento del pool reanuda desde el checkpoint)."""
+    from x_pool import run_queries, QUERY_TIMEOUT
+    if not has_auth_cookie():
+        # el pool no hace login interactivo: abrir una sesión con ventana una vez
+        _open_session(False, False).quit()
+    def runner(driver, job):
+        return run_job(driver, job, args, deadline=time.monotonic() + QUERY_TIMEOUT)
 
-        json_path = to_json(rows, QUERY)
-        print(f"(SAVE) JSON en: {json_path}")
-        if SAVE_CSV:
-            csv_path = to_csv(rows, QUERY)
-            print(f"(SAVE) CSV  en: {csv_path}")
+    results = run_queries(jobs, workers=args.workers, headless=args.headless,
+                          capture_network=args.network, runner=runner)
+    return [results[job["query"]] for job in jobs if results.get(job["query"])]
 
+def run_sequential(jobs, args):
+    """Todo el lote en una sola sesión caliente; devuelve las salidas."""
+    outputs = []
+    driver = _open_session(args.headless, args.network)
+    try:
+        for i, job in enumerate(jobs, 1):
+            if len(jobs) > 1:
+                print(f"=== [{i}/{len(jobs)}] {job['query']} ===")
+            try:
+                outputs.append(run_job(driver, job, args))
+            except WebDriverException as e:
+                if len(jobs) == 1:
+                    raise
+                print(f"(BAD) '{job['query']}': {type(e).__name__}; sesión nueva para la siguiente")
+                try:
+                    driver.quit()
+                except Exception:
+                    pass
+                driver = _open_session(args.headless, args.network)
     finally:
-        try:
-            driver.quit()
-        except Exception:
-            pass
+        if driver is not None:
+            try:
+                driver.quit()
+            except Exception:
+                pass
+    return outputs
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.batch:
+        jobs = load_batch(args.batch, args.max, args.out_prefix)
+    else:
+        jobs = [{"query": args.query, "max": args.max, "out_prefix": args.out_prefix}]
+    METRICS.open(METRICS_FILE)
+    if METRICS_PORT:
+        METRICS.serve(METRICS_PORT)
+    try:
+        if args.workers > 1 and len(jobs) > 1:
+            outputs = run_pooled(jobs, args)
+        else:
+            outputs = run_sequential(jobs, args)
+        if len(jobs) > 1 and outputs:
+            write_merged(outputs, " | ".join(job["query"] for job in jobs),
+                         SAVE_CSV and not args.json_only)
+    finally:
+        METRICS.report()
+        METRICS.close()
 
 if __name__ == "__main__":
     main()
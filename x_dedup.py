@@ -0,0 +1,204 @@
+"""Índices de deduplicación compactos para corridas largas.
+
+dedup_merge originalmente indexaba un dict por permalink completo (o por
+handle + texto) y guardaba la fila entera. Aquí la clave es el ID numérico
+del tweet (sacado del permalink) y hay tres almacenes intercambiables:
+
+- "ids":    set de enteros en memoria (exacto).
+- "sqlite": set en disco, persiste entre corridas (exacto).
+- "bloom":  filtro de Bloom con tasa de falsos positivos configurable
+            (aproximado: un tweet nuevo puede descartarse con prob. fp_rate).
+
+Todos exponen add(key) -> bool (True si era nueva), `in` y len(). En los
+índices en disco len() cuenta solo lo añadido en esta corrida (lo que el
+scraper compara con MAX_TWEETS); el histórico del archivo está en `total`.
+Cada búsqueda usa su propio archivo (index_for): borrar x_seen/<búsqueda>.*
+hace que la próxima corrida vuelva a recolectar todo.
+"""
+import hashlib, math, os, re, sqlite3, struct
+
+DEDUP_DIR      = "x_seen"      # un archivo por búsqueda para sqlite/bloom
+BLOOM_CAPACITY = 10_000_000
+BLOOM_FP_RATE  = 1e-4
+
+# Cabecera del archivo del filtro: magia, m (bits), k (hashes), claves guardadas
+_BLOOM_HEADER = struct.Struct("<4sQIQ")
+_BLOOM_MAGIC  = b"XBF1"
+
+_STATUS_RE = re.compile(r"/status/(\d+)")
+
+def tweet_id_from_permalink(url):
+    m = _STATUS_RE.search(url or "")
+    return int(m.group(1)) if m else None
+
+def row_key(row):
+    """Clave entera de una fila: el ID del tweet, o un hash de 63 bits
+    (negativo, para no chocar con IDs reales) si no hay permalink."""
+    tid = row.get("tweet_id") or tweet_id_from_permalink(row.get("permalink"))
+    if tid:
+        return int(tid)
+    raw = (row.get("handle", "") + (row.get("text", "")[:1000])).encode("utf-8")
+    h = int.from_bytes(hashlib.blake2b(raw, digest_size=8).digest(), "big")
+    return -(h >> 1) - 1
+
+class IntKeyIndex:
+    """Set de IDs enteros en memoria (~8x menos que claves permalink + filas)."""
+
+    def __init__(self):
+        self._keys = set()
+
+    def add(self, key):
+        if key in self._keys:
+            return False
+        self._keys.add(key)
+        return True
+
+    def __contains__(self, key):
+        return key in self._keys
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __iter__(self):
+        return iter(self._keys)
+
+class SqliteKeyIndex:
+    """Set de IDs en SQLite; sobrevive entre corridas y no vive en RAM."""
+
+    def __init__(self, path, commit_every=5000):
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS seen (id INTEGER PRIMARY KEY)")
+        self._stored = self.conn.execute("SELECT COUNT(*) FROM seen").fetchone()[0]
+        self._added = 0
+        self._pending = 0
+        self.commit_every = commit_every
+
+    def add(self, key):
+        cur = self.conn.execute("INSERT OR IGNORE INTO seen (id) VALUES (?)", (key,))
+        if cur.rowcount != 1:
+            return False
+        self._added += 1
+        self._pending += 1
+        if self._pending >= self.commit_every:
+            self.flush()
+        return True
+
+    def resume(self, count):
+        """Corrida reanudada: las `count` claves de antes cuentan en len()."""
+        # ya están en el archivo: pasan del histórico a esta corrida
+        self._stored = max(0, self._stored - count)
+        self._added = count
+
+    def __contains__(self, key):
+        return self.conn.execute("SELECT 1 FROM seen WHERE id = ?", (key,)).fetchone() is not None
+
+    def __len__(self):
+        return self._added
+
+    @property
+    def total(self):
+        return self._stored + self._added
+
+    def flush(self):
+        self.conn.commit()
+        self._pending = 0
+
+    def close(self):
+        self.flush()
+        self.conn.close()
+
+class BloomKeyIndex:
+    """Filtro de Bloom de tamaño fijo; memoria = -n ln(p) / ln(2)^2 bits.
+
+    Con `path`, los bits se guardan en disco en flush()/close() y se
+    recargan al abrir, para reutilizarlo entre corridas. m y k van en la
+    cabecera del archivo: al recargar mandan ellos, no capacity/fp_rate."""
+
+    def __init__(self, capacity=BLOOM_CAPACITY, fp_rate=BLOOM_FP_RATE, path=None):
+        self.m = max(8, int(-capacity * math.log(fp_rate) / (math.log(2) ** 2)))
+        self.k = max(1, round(self.m / capacity * math.log(2)))
+        self.path = path
+        self._stored = self._added = 0
+        if path and os.path.exists(path):
+            with open(path, "rb") as f:
+                head = f.read(_BLOOM_HEADER.size)
+                bits = f.read()
+            magic = head[:4] if len(head) == _BLOOM_HEADER.size else None
+            if magic != _BLOOM_MAGIC:
+                raise ValueError(f"{path}: no es un filtro de x_dedup (¿versión sin cabecera?); bórralo")
+            _, self.m, self.k, self._stored = _BLOOM_HEADER.unpack(head)
+            if len(bits) != (self.m + 7) // 8:
+                raise ValueError(f"{path}: filtro truncado ({len(bits)} bytes para m={self.m})")
+            self.bits = bytearray(bits)
+        else:
+            self.bits = bytearray((self.m + 7) // 8)
+
+    def _positions(self, key):
+        d = hashlib.blake2b(key.to_bytes(8, "big", signed=True), digest_size=16).digest()
+        h1 = int.from_bytes(d[:8], "little")
+        h2 = int.from_bytes(d[8:], "little") | 1
+        return [(h1 + i * h2) % self.m for i in range(self.k)]
+
+    def add(self, key):
+        bits = self.bits
+        new = False
+        for p in self._positions(key):
+            byte, mask = p >> 3, 1 << (p & 7)
+            if not bits[byte] & mask:
+                bits[byte] |= mask
+                new = True
+        if new:
+            self._added += 1
+        return new
+
+    def resume(self, count):
+        """Corrida reanudada: las `count` claves de antes cuentan en len()."""
+        # ya están en el archivo: pasan del histórico a esta corrida
+        self._stored = max(0, self._stored - count)
+        self._added = count
+
+    def __contains__(self, key):
+        bits = self.bits
+        return all(bits[p >> 3] & (1 << (p & 7)) for p in self._positions(key))
+
+    def __len__(self):
+        return self._added
+
+    @property
+    def total(self):
+        return self._stored + self._added
+
+    def flush(self):
+        if self.path:
+            tmp = self.path + ".tmp"
+            with open(tmp, "wb") as f:
+                f.write(_BLOOM_HEADER.pack(_BLOOM_MAGIC, self.m, self.k, self.total))
+                f.write(self.bits)
+            os.replace(tmp, self.path)
+
+    def close(self):
+        self.flush()
+
+def make_dedup_index(kind="ids", **kw):
+    """kind: "dict" (clave permalink, comportamiento original), "ids",
+    "sqlite" o "bloom"."""
+    if kind == "dict":
+        return {}
+    if kind == "ids":
+        return IntKeyIndex()
+    if kind == "sqlite":
+        return SqliteKeyIndex(**kw)
+    if kind == "bloom":
+        return BloomKeyIndex(**kw)
+    raise ValueError(f"Índice de deduplicación desconocido: {kind!r}")
+
+def index_for(kind, name, directory=DEDUP_DIR):
+    """Índice de la búsqueda `name` (un slug). Los de disco van a
+    directory/<name>.<kind>: nunca se comparten entre búsquedas ni con
+    otros programas (limpieza usa el suyo)."""
+    if kind not in ("sqlite", "bloom"):
+        return make_dedup_index(kind)
+    os.makedirs(directory, exist_ok=True)
+    return make_dedup_index(kind, path=os.path.join(directory, f"{name}.{kind}"))
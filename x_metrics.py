@@ -0,0 +1,168 @@
+"""Instrumentación del scraper: tiempos por etapa, llamadas WebDriver,
+rendimiento por ronda y contadores de errores.
+
+Uso: `with METRICS.stage("extract"): ...`, METRICS.incr("stale_elements"),
+METRICS.round(added, total). Los eventos salen como JSON-lines (un objeto
+por ronda y un resumen final) y, opcionalmente, en texto Prometheus por
+HTTP para monitores de larga duración.
+"""
+import json, threading, time
+from collections import defaultdict
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+class Metrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.started = time.monotonic()
+            self.stage_seconds = defaultdict(float)
+            self.stage_calls = defaultdict(int)
+            self.webdriver_calls = defaultdict(int)
+            self.counters = defaultdict(int)
+            self.rounds = 0
+            self.zero_yield_rounds = 0
+            self.tweets = 0
+            self._last_round = time.monotonic()
+            self._out = None
+
+    # ---- salida JSON-lines ----
+    def open(self, path):
+        if path:
+            self._out = open(path, "a", encoding="utf-8")
+
+    def emit(self, event, **fields):
+        if self._out is None:
+            return
+        rec = {"ts": time.time(), "event": event, **fields}
+        with self._lock:
+            self._out.write(json.dumps(rec, ensure_ascii=False) + "\n")
+            self._out.flush()
+
+    def close(self):
+        if self._out is not None:
+            self._out.close()
+            self._out = None
+
+    # ---- medición ----
+    @contextmanager
+    def stage(self, name):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            dt = time.perf_counter() - t0
+            with self._lock:
+                self.stage_seconds[name] += dt
+                self.stage_calls[name] += 1
+
+    def incr(self, name, n=1):
+        with self._lock:
+            self.counters[name] += n
+
+    def round(self, added, total, **extra):
+        now = time.monotonic()
+        with self._lock:
+            self.rounds += 1
+            self.tweets += added
+            if not added:
+                self.zero_yield_rounds += 1
+            seconds = now - self._last_round
+            self._last_round = now
+            calls = sum(self.webdriver_calls.values())
+            n = self.rounds
+        self.emit("round", round=n, added=added, total=total,
+                  seconds=round(seconds, 3), webdriver_calls=calls, **extra)
+
+    def instrument_driver(self, driver):
+        """Cuenta cada comando WebDriver (una ida y vuelta HTTP) por nombre."""
+        execute = driver.execute
+
+        def counted(driver_command, params=None):
+            with self._lock:
+                self.webdriver_calls[driver_command] += 1
+            return execute(driver_command, params)
+
+        driver.execute = counted
+        return driver
+
+    # ---- reportes ----
+    def summary(self):
+        with self._lock:
+            elapsed = time.monotonic() - self.started
+            calls = sum(self.webdriver_calls.values())
+            return {
+                "elapsed_s": round(elapsed, 3),
+                "tweets": self.tweets,
+                "tweets_per_s": round(self.tweets / elapsed, 3) if elapsed else 0.0,
+                "rounds": self.rounds,
+                "zero_yield_rounds": self.zero_yield_rounds,
+                "mean_yield": round(self.tweets / self.rounds, 2) if self.rounds else 0.0,
+                "webdriver_calls": calls,
+                "webdriver_calls_per_tweet": round(calls / self.tweets, 2) if self.tweets else None,
+                "webdriver_by_command": dict(self.webdriver_calls),
+                "stages": {
+                    k: {"calls": self.stage_calls[k], "total_s": round(v, 3),
+                        "mean_ms": round(1000 * v / self.stage_calls[k], 2)}
+                    for k, v in sorted(self.stage_seconds.items(), key=lambda kv: -kv[1])
+                },
+                "counters": dict(self.counters),
+            }
+
+    def report(self):
+        s = self.summary()
+        self.emit("summary", **s)
+        print(f"(METRICS) {s['tweets']} tweets en {s['elapsed_s']}s "
+              f"({s['tweets_per_s']}/s), {s['rounds']} rondas "
+              f"({s['zero_yield_rounds']} sin nuevos), "
+              f"{s['webdriver_calls']} llamadas WebDriver")
+        for name, st in s["stages"].items():
+            print(f"  {name:<16} {st['total_s']:>9.3f}s  {st['calls']:>6} llamadas  "
+                  f"{st['mean_ms']:>9.2f} ms/llamada")
+        for name, n in s["counters"].items():
+            print(f"  [{name}] {n}")
+        return s
+
+    def prometheus(self):
+        lines = []
+        with self._lock:
+            lines.append("# TYPE x_scraper_tweets_total counter")
+            lines.append(f"x_scraper_tweets_total {self.tweets}")
+            lines.append("# TYPE x_scraper_rounds_total counter")
+            lines.append(f"x_scraper_rounds_total {self.rounds}")
+            lines.append(f"x_scraper_zero_yield_rounds_total {self.zero_yield_rounds}")
+            lines.append("# TYPE x_scraper_stage_seconds_total counter")
+            for k, v in self.stage_seconds.items():
+                lines.append(f'x_scraper_stage_seconds_total{{stage="{k}"}} {v:.6f}')
+                lines.append(f'x_scraper_stage_calls_total{{stage="{k}"}} {self.stage_calls[k]}')
+            lines.append("# TYPE x_scraper_webdriver_calls_total counter")
+            for k, v in self.webdriver_calls.items():
+                lines.append(f'x_scraper_webdriver_calls_total{{command="{k}"}} {v}')
+            for k, v in self.counters.items():
+                lines.append(f'x_scraper_events_total{{name="{k}"}} {v}')
+        return "\n".join(lines) + "\n"
+
+    def serve(self, port, host="127.0.0.1"):
+        """Expone /metrics en texto Prometheus desde un hilo de fondo."""
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                body = metrics.prometheus().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
+
+METRICS = Metrics()
@@ -0,0 +1,248 @@
+"""Monitoreo continuo de una búsqueda: solo lo nuevo desde la última vuelta.
+
+Mantiene una sesión de Chrome abierta sobre la pestaña "Latest" de la
+búsqueda y cada POLL_INTERVAL segundos recarga la parte superior de la
+timeline. Baja solo hasta toparse con lo ya visto (IDs <= el máximo
+guardado en MONITOR_STATE) y escribe únicamente el delta, así el coste de
+cada vuelta es proporcional a los tweets realmente nuevos y no al
+histórico. Los IDs de X crecen con el tiempo, así que "ID <= marca" es
+"ya visto"; un solo tweet viejo arriba (promocionado, fuera de orden) no
+corta la vuelta: hacen falta KNOWN_STREAK ya vistos seguidos.
+
+Si una vuelta agota MAX_POLL_ROUNDS sin llegar a la marca (pico de
+actividad o daemon detenido mucho tiempo), el hueco se anota en el estado
+para rellenarlo luego con x_shards.
+
+    python x_monitor.py                                   # QUERY de x_crapy_json
+    python x_monitor.py --query "paro nacional lang:es" --interval 60
+"""
+import argparse, json, os, random, time
+from datetime import datetime
+
+from selenium.common.exceptions import TimeoutException, WebDriverException
+from selenium.webdriver.common.by import By
+from selenium.webdriver.common.keys import Keys
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
+
+from x_crapy_json import (
+    build_driver, load_cookies, has_auth_cookie, go_to_search, extract_visible_tweets,
+    install_growth_observer, wait_for_timeline_growth, dedup_merge, TimelineCapture,
+    RateLimiter, query_slug, QUERY, SAVE_CSV, CAPTURE_MODE, METRICS_FILE, METRICS_PORT
+)
+from x_dedup import IntKeyIndex, tweet_id_from_permalink
+from x_metrics import METRICS
+from x_sinks import StreamSink
+
+POLL_INTERVAL   = 120            # segundos entre vueltas
+POLL_JITTER     = 20             # jitter aleatorio añadido al intervalo
+MAX_POLL_ROUNDS = 30             # scrolls máx. por vuelta antes de declarar hueco
+BACKFILL        = 200            # primera vuelta sin marca: tweets a tomar
+KNOWN_STREAK    = 5              # ya vistos seguidos (distintos) = se llegó a la marca
+MONITOR_STATE   = "monitor_state.json"
+MAX_FAILURES    = 5              # caídas seguidas del driver antes de rendirse
+
+def load_state(path=MONITOR_STATE):
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def save_state(state, path=MONITOR_STATE):
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(state, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, path)
+
+def _row_id(row):
+    tid = row.get("tweet_id") or tweet_id_from_permalink(row.get("permalink"))
+    return int(tid) if tid else None
+
+def poll_once(driver, high_water, sink, capture=None, max_rounds=MAX_POLL_ROUNDS,
+              backfill=BACKFILL, limiter=None):
+    """Una vuelta sobre la timeline ya cargada (recién recargada).
+
+    Devuelve (nuevos, id_máximo_visto, id_mínimo_nuevo, llegó_a_la_marca)."""
+    limiter = limiter or RateLimiter()
+    seen = IntKeyIndex()   # solo dentro de la vuelta: entre vueltas manda la marca
+    growth = install_growth_observer(driver)
+    body = driver.find_element(By.TAG_NAME, "body")
+    newest = oldest = None
+    reached = False
+    rounds = idle = 0
+    streak = set()   # ya vistos distintos desde el último tweet nuevo
+    while rounds < max_rounds:
+        rows = []
+        if capture:
+            with METRICS.stage("capture"):
+                rows = capture.poll(driver)
+        if not rows and not (capture and capture.responses):
+            with METRICS.stage("extract"):
+                rows = extract_visible_tweets(driver)
+        fresh = []
+        for r in rows:
+            tid = _row_id(r)
+            if tid is not None and high_water is not None and tid <= high_water:
+                streak.add(tid)
+                reached = reached or len(streak) >= KNOWN_STREAK
+                continue
+            if tid is not None:
+                streak.clear()
+                newest = tid if newest is None else max(newest, tid)
+                oldest = tid if oldest is None else min(oldest, tid)
+            fresh.append(r)
+        with METRICS.stage("dedup_write"):
+            added = dedup_merge(seen, fresh, sink=sink)
+        METRICS.round(added, len(seen), seen=len(rows))
+        if reached:
+            break
+        if high_water is None and len(seen) >= backfill:
+            reached = True
+            break
+        with METRICS.stage("pacing"):
+            limiter.wait()
+        with METRICS.stage("scroll"):
+            body.send_keys(Keys.END)
+        with METRICS.stage("wait_growth"):
+            new_growth = wait_for_timeline_growth(driver, growth)
+        idle = 0 if (new_growth > growth or added) else idle + 1
+        growth = new_growth
+        rounds += 1
+        if idle >= 2:
+            reached = True   # la timeline no da más: no hay hueco que anotar
+            break
+    return len(seen), newest, oldest, reached
+
+def reload_timeline(driver, timeout=30):
+    """Vuelve a la parte superior de la búsqueda sin repetir go_to_search."""
+    driver.refresh()
+    try:
+        WebDriverWait(driver, timeout).until(
+            EC.presence_of_element_located((By.CSS_SELECTOR, 'article[data-testid="tweet"]'))
+        )
+    except TimeoutException:
+        pass   # búsqueda sin resultados recientes: la vuelta saldrá vacía
+
+class Monitor:
+    def __init__(self, query, interval=POLL_INTERVAL, jitter=POLL_JITTER,
+                 capture_network=False, headless=True, state_path=MONITOR_STATE):
+        self.query = query
+        self.interval = interval
+        self.jitter = jitter
+        self.capture_network = capture_network
+        self.headless = headless
+        self.state_path = state_path
+        self.state = load_state(state_path)
+        self.driver = None
+        self.sink = None
+        self._sink_day = None
+
+    @property
+    def high_water(self):
+        return self.state.get(self.query, {}).get("high_water")
+
+    def _open_session(self):
+        self.close_driver()
+        self.driver = build_driver(headless=self.headless, capture_network=self.capture_network)
+        load_cookies(self.driver)
+        with METRICS.stage("go_to_search"):
+            go_to_search(self.driver, self.query, timeout=60)
+
+    def close_driver(self):
+        if self.driver is not None:
+            try:
+                self.driver.quit()
+            except Exception:
+                pass
+            self.driver = None
+
+    def _current_sink(self):
+        # Un archivo por día: el daemon no deja un NDJSON infinito
+        day = datetime.now().strftime("%Y%m%d")
+        if self.sink is None or self._sink_day != day:
+            if self.sink is not None:
+                self.sink.close()
+            self.sink = StreamSink(prefix=f"x_live_{query_slug(self.query)}", csv_out=SAVE_CSV)
+            self._sink_day = day
+        return self.sink
+
+    def cycle(self):
+        capture = TimelineCapture() if self.capture_network else None
+        if self.driver is None:
+            self._open_session()
+        else:
+            if capture:
+                self.driver.get_log("performance")  # solo respuestas de esta vuelta
+            with METRICS.stage("reload"):
+                reload_timeline(self.driver)
+        hw = self.high_water
+        added, newest, oldest, reached = poll_once(self.driver, hw, self._current_sink(),
+                                                   capture=capture)
+        entry = self.state.setdefault(self.query, {})
+        if newest is not None and (hw is None or newest > hw):
+            entry["high_water"] = newest
+        if not reached and hw is not None and oldest is not None:
+            # No se llegó a la marca: quedan tweets entre hw y oldest sin ver
+            entry.setdefault("gaps", []).append({"after_id": hw, "before_id": oldest,
+                                                 "noted_at": datetime.now().isoformat()})
+            print(f"(GAP) No se alcanzó el último visto ({hw}); hueco hasta {oldest}. "
+                  "Rellénalo con x_shards.")
+        entry["updated_at"] = datetime.now().isoformat()
+        entry["total"] = entry.get("total", 0) + added
+        save_state(self.state, self.state_path)
+        return added
+
+    def run(self, max_cycles=None):
+        failures = cycles = 0
+        print(f"(MONITOR) '{self.query}' cada ~{self.interval}s; último visto: {self.high_water}")
+        try:
+            while max_cycles is None or cycles < max_cycles:
+                t0 = time.monotonic()
+                try:
+                    added = self.cycle()
+                    failures = 0
+                    print(f"  [{datetime.now():%H:%M:%S}] +{added} nuevos "
+                          f"({time.monotonic() - t0:.1f}s)")
+                except WebDriverException as e:
+                    failures += 1
+                    print(f"(BAD) Sesión caída ({failures}/{MAX_FAILURES}): {e.__class__.__name__}")
+                    self.close_driver()
+                    if failures >= MAX_FAILURES:
+                        raise
+                cycles += 1
+                if max_cycles is not None and cycles >= max_cycles:
+                    break
+                time.sleep(self.interval + random.uniform(0, self.jitter))
+        except KeyboardInterrupt:
+            print("(STOP) Monitor detenido.")
+        finally:
+            if self.sink is not None:
+                self.sink.close()
+                print(f"(SAVE) NDJSON en: {self.sink.ndjson_path}")
+            self.close_driver()
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--query", default=QUERY)
+    ap.add_argument("--interval", type=float, default=POLL_INTERVAL)
+    ap.add_argument("--cycles", type=int, default=None, help="vueltas (por defecto, sin fin)")
+    ap.add_argument("--network", action="store_true", default=CAPTURE_MODE == "network",
+                    help="leer el JSON SearchTimeline en vez del DOM")
+    ap.add_argument("--state", default=MONITOR_STATE)
+    args = ap.parse_args()
+
+    if not has_auth_cookie():
+        raise SystemExit("(BAD) Sin sesión en x_cookies.json: corre antes x_crapy_json.py")
+    METRICS.open(METRICS_FILE)
+    if METRICS_PORT:
+        METRICS.serve(METRICS_PORT)
+    monitor = Monitor(args.query, interval=args.interval, capture_network=args.network,
+                      state_path=args.state)
+    try:
+        monitor.run(max_cycles=args.cycles)
+    finally:
+        METRICS.report()
+        METRICS.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+"""Registro tipado de tweet y salida columnar Parquet particionada.
+
+Las filas del scraper son dicts libres; aquí se convierten a TweetRecord
+(tipos fijos) y se escriben a un dataset Parquet particionado por query y
+fecha, con timestamp real, enteros int64 y handles diccionario-codificados.
+Los scripts de análisis pueden leer ese dataset con load_tweets() (pasando
+la carpeta como entrada) en lugar de re-parsear el CSV cada vez.
+
+Requiere pyarrow (y pandas para load_tweets).
+"""
+import os, re
+from dataclasses import dataclass, asdict, field
+from datetime import datetime, timezone
+from typing import Optional
+
+PARQUET_DIR   = "x_parquet"
+PARQUET_BATCH = 5000                  # filas por archivo escrito
+TZ_EC         = "America/Guayaquil"
+
+_STATUS_RE = re.compile(r"/status/(\d+)")
+
+@dataclass(slots=True)
+class TweetRecord:
+    tweet_id: Optional[int]
+    display_name: str
+    handle: str
+    text: str
+    timestamp: Optional[datetime]
+    permalink: Optional[str]
+    replies: int = 0
+    retweets: int = 0
+    likes: int = 0
+    quotes: Optional[int] = None
+    views: Optional[int] = None
+    in_reply_to_id: Optional[int] = None
+    quoted_id: Optional[int] = None
+    urls: list[str] = field(default_factory=list)
+    media_types: list[str] = field(default_factory=list)
+    media_urls: list[str] = field(default_factory=list)
+    reply_to: list[str] = field(default_factory=list)
+
+    @classmethod
+    def from_row(cls, row):
+        ts = row.get("timestamp")
+        if ts:
+            ts = datetime.fromisoformat(ts.replace("Z", "+00:00")).astimezone(timezone.utc)
+        tid = row.get("tweet_id")
+        if not tid:
+            m = _STATUS_RE.search(row.get("permalink") or "")
+            tid = m.group(1) if m else None
+        return cls(
+            tweet_id=_int_or_none(tid),
+            display_name=row.get("display_name") or "",
+            handle=row.get("handle") or "",
+            text=row.get("text") or "",
+            timestamp=ts or None,
+            permalink=row.get("permalink"),
+            replies=int(row.get("replies") or 0),
+            retweets=int(row.get("retweets") or 0),
+            likes=int(row.get("likes") or 0),
+            quotes=_int_or_none(row.get("quotes")),
+            views=_int_or_none(row.get("views")),
+            in_reply_to_id=_int_or_none(row.get("in_reply_to_id")),
+            quoted_id=_int_or_none(row.get("quoted_id")),
+            urls=list(row.get("urls") or []),
+            media_types=[m.get("type") for m in row.get("media") or []],
+            media_urls=[m.get("url") for m in row.get("media") or []],
+            reply_to=list(row.get("reply_to") or []),
+        )
+
+def _int_or_none(v):
+    try:
+        return int(v)
+    except (TypeError, ValueError):
+        return None
+
+def _pyarrow():
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError("(BAD) La salida Parquet requiere pyarrow: pip install pyarrow")
+    return pa, pq
+
+def arrow_schema():
+    pa, _ = _pyarrow()
+    dict_str = pa.dictionary(pa.int32(), pa.string())
+    return pa.schema([
+        ("tweet_id", pa.int64()),
+        ("display_name", dict_str),
+        ("handle", dict_str),
+        ("text", pa.string()),
+        ("timestamp", pa.timestamp("us", tz="UTC")),
+        ("permalink", pa.string()),
+        ("replies", pa.int64()),
+        ("retweets", pa.int64()),
+        ("likes", pa.int64()),
+        ("quotes", pa.int64()),
+        ("views", pa.int64()),
+        ("in_reply_to_id", pa.int64()),
+        ("quoted_id", pa.int64()),
+        ("urls", pa.list_(pa.string())),
+        ("media_types", pa.list_(dict_str)),
+        ("media_urls", pa.list_(pa.string())),
+        ("reply_to", pa.list_(pa.string())),
+        ("query", pa.string()),
+        ("date", pa.string()),
+    ])
+
+class ParquetSink:
+    """Sink compatible con StreamSink (write/sync/close) que escribe a
+    <root>/query=<q>/date=<YYYY-MM-DD>/*.parquet cada PARQUET_BATCH filas."""
+
+    def __init__(self, query, root=PARQUET_DIR, batch_rows=PARQUET_BATCH):
+        _pyarrow()
+        self.query = query
+        self.root = root
+        self.batch_rows = batch_rows
+        self.count = 0
+        self.closed = False
+        self._buf = []
+
+    def write(self, rows):
+        for r in rows:
+            self._buf.append(TweetRecord.from_row(r))
+            self.count += 1
+        if len(self._buf) >= self.batch_rows:
+            self.sync()
+
+    def sync(self):
+        if not self._buf:
+            return
+        pa, pq = _pyarrow()
+        cols = {f: [] for f in TweetRecord.__dataclass_fields__}
+        for rec in self._buf:
+            for k, v in asdict(rec).items():
+                cols[k].append(v)
+        n = len(self._buf)
+        cols["query"] = [self.query] * n
+        cols["date"] = [ts.strftime("%Y-%m-%d") if ts else "unknown" for ts in cols["timestamp"]]
+        table = pa.Table.from_pydict(cols, schema=arrow_schema())
+        pq.write_to_dataset(table, self.root, partition_cols=["query", "date"])
+        self._buf = []
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        self.sync()
+
+def load_tweets(path="dataset_limpio.csv", columns=None):
+    """DataFrame con columna ts_ec (hora de Ecuador) para los scripts de análisis.
+
+    `path` es el CSV limpio o, si es una carpeta, el dataset Parquet. Este
+    es la salida cruda de cada corrida: un tweet capturado en dos corridas
+    o búsquedas aparece dos veces, así que se deduplica por tweet_id."""
+    import pandas as pd
+    if os.path.isdir(path):
+        cols = None
+        if columns is not None:
+            cols = [("timestamp" if c == "ts_ec" else c) for c in columns]
+            cols += [] if "tweet_id" in cols else ["tweet_id"]
+        df = pd.read_parquet(path, columns=cols)
+        dup = df["tweet_id"].duplicated() & df["tweet_id"].notna()
+        df = df[~dup].reset_index(drop=True)
+        if columns is not None and "tweet_id" not in columns:
+            df = df.drop(columns="tweet_id")
+        if "timestamp" in df:
+            df["ts_ec"] = df.pop("timestamp").dt.tz_convert(TZ_EC)
+        return df
+    # en el CSV las columnas pedidas que no existan (p. ej. tweet_id en
+    # datasets anteriores a limpieza.py) simplemente no se cargan
+    usecols = None if columns is None else (lambda c: c in columns)
+    return pd.read_csv(path, usecols=usecols, parse_dates=["ts_ec"])
@@ -0,0 +1,159 @@
+"""Pool de sesiones de Chrome autenticadas para lanzar muchas búsquedas.
+
+Cada worker mantiene un driver caliente (cookies de x_cookies.json ya
+cargadas) y toma búsquedas de una cola compartida, una a la vez. Si una
+sesión se cuelga o Chrome se cae, el worker la descarta, abre otra y
+reintenta la búsqueda.
+
+    python x_pool.py consultas.txt --workers 3 --max 500   # mismo formato que --batch
+"""
+import argparse, queue, threading, time
+
+from selenium.common.exceptions import WebDriverException
+
+from x_crapy_json import (
+    build_driver, load_cookies, has_auth_cookie, scrape_query, dedup_merge,
+    resolve_driver_path, to_json, to_csv, RateLimiter, query_slug, load_batch, MAX_TWEETS
+)
+
+POOL_SIZE          = 3       # sesiones de Chrome simultáneas
+QUERIES_PER_SESSION = 25     # reciclar el driver tras N búsquedas (fugas de memoria)
+MAX_RETRIES        = 2       # reintentos por búsqueda tras caída/cuelgue
+QUERY_TIMEOUT      = 900     # segundos máx. por búsqueda
+PAGE_LOAD_TIMEOUT  = 60      # un driver.get colgado lanza excepción y se recicla
+
+def _normalize(q):
+    if isinstance(q, str):
+        return {"query": q, "max": MAX_TWEETS}
+    return {**q, "max": q.get("max", MAX_TWEETS)}
+
+class SessionWorker(threading.Thread):
+    """Un hilo = una sesión de Chrome = una búsqueda en curso."""
+
+    def __init__(self, wid, jobs, results, driver_path, headless, capture_network,
+                 pacing=None, runner=None):
+        super().__init__(name=f"worker-{wid}", daemon=True)
+        self.wid = wid
+        self.jobs = jobs
+        self.results = results
+        self.driver_path = driver_path
+        self.headless = headless
+        self.capture_network = capture_network
+        self.pacing = pacing   # (intervalo mínimo, jitter) entre scrolls; None = por defecto
+        self.runner = runner   # runner(driver, job) en vez de scrape_query (p. ej. run_job)
+        self.driver = None
+        self.served = 0
+
+    def _open(self):
+        # Sin perfil persistente: Chrome no permite compartir un user-data-dir
+        self.driver = build_driver(headless=self.headless,
+                                   capture_network=self.capture_network,
+                                   driver_path=self.driver_path, profile_dir=False)
+        self.driver.set_page_load_timeout(PAGE_LOAD_TIMEOUT)
+        load_cookies(self.driver)
+        self.served = 0
+
+    def _close(self):
+        if self.driver is not None:
+            try:
+                self.driver.quit()
+            except Exception:
+                pass
+        self.driver = None
+
+    def run(self):
+        try:
+            while True:
+                try:
+                    job = self.jobs.get_nowait()
+                except queue.Empty:
+                    return
+                self._run_job(job)
+                self.jobs.task_done()
+        finally:
+            self._close()
+
+    def _run_job(self, job):
+        query = job["query"]
+        for attempt in range(MAX_RETRIES + 1):
+            try:
+                if self.driver is None or self.served >= QUERIES_PER_SESSION:
+                    self._close()
+                    self._open()
+                print(f"[{self.name}] '{query}' (intento {attempt + 1})")
+                if self.runner is not None:
+                    out = self.runner(self.driver, job)
+                else:
+                    out = scrape_query(self.driver, query, job["max"],
+                                       capture_network=self.capture_network,
+                                       deadline=time.monotonic() + QUERY_TIMEOUT,
+                                       limiter=RateLimiter(*self.pacing) if self.pacing else None)
+                self.served += 1
+                self.results[query] = out
+                return
+            except WebDriverException as e:
+                # Incluye TimeoutException y caídas de Chrome: sesión nueva
+                print(f"[{self.name}] (BAD) '{query}': {type(e).__name__}; reiniciando sesión")
+                self._close()
+        print(f"[{self.name}] (BAD) '{query}' abandonada tras {MAX_RETRIES + 1} intentos")
+        self.results[query] = []
+
+def run_queries(queries, workers=POOL_SIZE, headless=True, capture_network=False,
+                pacing=None, runner=None):
+    """Ejecuta las búsquedas en un pool acotado de sesiones.
+
+    `queries` es una lista de strings o de dicts {"query": ..., "max": ...}.
+    Devuelve {query: filas}, o {query: lo que devuelva runner(driver, job)}
+    si se pasa `runner` (vacío para las búsquedas abandonadas)."""
+    if not has_auth_cookie():
+        raise RuntimeError("(BAD) No hay auth_token en x_cookies.json; "
+                           "ejecuta x_crapy_json.py una vez para iniciar sesión.")
+    jobs = queue.Queue()
+    for q in queries:
+        jobs.put(_normalize(q))
+    results = {}
+    # Resolver chromedriver una sola vez para todo el pool
+    driver_path = resolve_driver_path()
+    pool = [SessionWorker(i, jobs, results, driver_path, headless, capture_network, pacing,
+                          runner)
+            for i in range(min(workers, jobs.qsize()))]
+    for w in pool:
+        w.start()
+    for w in pool:
+        w.join()
+    return results
+
+def merge_results(results):
+    """Une las filas de todas las búsquedas con deduplicación global."""
+    by_key = {}
+    for rows in results.values():
+        dedup_merge(by_key, rows)
+    return list(by_key.values())
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("queries", help="archivo de lote (YAML/JSON/txt, como --batch de x_crapy_json)")
+    ap.add_argument("--workers", type=int, default=POOL_SIZE)
+    ap.add_argument("--max", type=int, default=MAX_TWEETS)
+    ap.add_argument("--network", action="store_true", help="capturar JSON SearchTimeline")
+    ap.add_argument("--csv", action="store_true")
+    args = ap.parse_args()
+
+    queries = load_batch(args.queries, args.max)
+    results = run_queries(queries, workers=args.workers, capture_network=args.network)
+
+    for query, rows in results.items():
+        path = to_json(rows, query, prefix=f"x_tweets_{query_slug(query)}")
+        print(f"(SAVE) {len(rows):>5} tweets '{query}' -> {path}")
+        if args.csv:
+            to_csv(rows, query, prefix=f"x_tweets_{query_slug(query)}")
+
+    merged = merge_results(results)
+    label = " | ".join(results)
+    path = to_json(merged, label, prefix="x_tweets_merged")
+    print(f"(OK) Total deduplicado: {len(merged)} -> {path}")
+    if args.csv:
+        to_csv(merged, label, prefix="x_tweets_merged")
+
+if __name__ == "__main__":
+    main()
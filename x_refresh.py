@@ -0,0 +1,352 @@
+"""Refresco de métricas de interacción de tweets ya recolectados.
+
+replies/retweets/likes quedan congelados en lo que mostraba la tarjeta al
+scrapear (muchas filas son 0/0/0 porque se capturaron segundos después de
+publicarse). Este job registra los permalinks en REFRESH_DB, los revisita a
+edades programadas (REFRESH_AGES tras la publicación) y anexa cada lectura
+como una instantánea en la tabla `snapshots`, formando una serie temporal.
+
+- Prioridad: entre los vencidos, primero los de mayor velocidad
+  (interacciones por hora desde la lectura anterior).
+- Rendimiento: un pool de sesiones de Chrome (SessionWorker de x_pool) y un
+  tope global de visitas por hora (--rate). Con --network se lee el JSON
+  TweetDetail en vez del DOM.
+- Sin navegador: --observe suma como instantáneas las filas de corridas
+  posteriores (JSON/NDJSON/CSV del scraper o del monitor) que repiten
+  tweets, fechadas cuando se scrapearon (generated_at del JSON o, en
+  NDJSON/CSV, la última escritura del archivo), no cuando se ingieren.
+
+    python x_refresh.py --track dataset_limpio.csv x_tweets_20251021_1200.ndjson
+    python x_refresh.py --run --workers 3 --rate 3000
+    python x_refresh.py --run --loop            # daemon: duerme hasta el próximo vencimiento
+    python x_refresh.py --export snapshots.csv
+"""
+import argparse, csv, os, queue, re, sqlite3, threading, time
+from datetime import datetime
+
+import x_pool
+from selenium.common.exceptions import TimeoutException, WebDriverException
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
+
+from limpieza import iter_raw
+from x_crapy_json import extract_visible_tweets, has_auth_cookie, resolve_driver_path, TimelineCapture
+from x_dedup import tweet_id_from_permalink
+from x_timeline import parse_tweet_detail
+
+REFRESH_DB        = "x_refresh.sqlite"
+REFRESH_AGES      = [3600, 24 * 3600, 7 * 24 * 3600]   # segundos tras la publicación
+REFRESH_WORKERS   = 3
+REFRESH_RATE      = 3000      # visitas máx. por hora entre todos los workers
+REFRESH_BATCH     = 1000      # vencidos que se toman por pasada
+PAGES_PER_SESSION = 200       # reciclar el driver tras N visitas
+DETAIL_TIMEOUT    = 15        # espera máx. al tweet en la página de detalle
+MAX_FAILURES      = 3         # visitas fallidas seguidas: borrado/protegido, se deja
+
+METRIC_FIELDS = ["replies", "retweets", "likes", "quotes", "views"]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tracked (
+    tweet_id   INTEGER PRIMARY KEY,
+    permalink  TEXT NOT NULL,
+    posted_at  REAL NOT NULL,          -- epoch UTC
+    stage      INTEGER NOT NULL DEFAULT 0,   -- índice en REFRESH_AGES de la próxima visita
+    due_at     REAL,                   -- NULL = sin visitas pendientes
+    velocity   REAL NOT NULL DEFAULT 0,      -- interacciones/hora en la última lectura
+    engagement INTEGER NOT NULL DEFAULT 0,
+    last_at    REAL,
+    failures   INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS tracked_due ON tracked(due_at);
+CREATE TABLE IF NOT EXISTS snapshots (
+    tweet_id   INTEGER NOT NULL,
+    fetched_at REAL NOT NULL,
+    age_s      REAL NOT NULL,
+    replies    INTEGER, retweets INTEGER, likes INTEGER, quotes INTEGER, views INTEGER,
+    source     TEXT
+);
+CREATE INDEX IF NOT EXISTS snapshots_tweet ON snapshots(tweet_id, fetched_at);
+"""
+
+def _epoch(ts):
+    """ISO ('...Z' del scraper o '2025-05-31 08:12:11-05:00' del CSV limpio) -> epoch."""
+    if not ts:
+        return None
+    try:
+        return datetime.fromisoformat(str(ts).replace("Z", "+00:00")).timestamp()
+    except ValueError:
+        return None
+
+def _engagement(row):
+    return sum(int(row.get(k) or 0) for k in ("replies", "retweets", "likes"))
+
+def _next_stage(posted_at, now, stage=0):
+    """Primera edad programada aún no cumplida (las ya vencidas se saltan)."""
+    while stage < len(REFRESH_AGES) and posted_at + REFRESH_AGES[stage] <= now:
+        stage += 1
+    if stage >= len(REFRESH_AGES):
+        return stage, None
+    return stage, posted_at + REFRESH_AGES[stage]
+
+_GENERATED_RE = re.compile(r'"generated_at"\s*:\s*"([^"]+)"')
+
+def observed_at(path):
+    """Epoch en que se scrapearon las filas de `path`: generated_at del sobre
+    JSON (va al inicio del archivo) o, si no hay, su última modificación."""
+    if path.endswith(".json"):
+        with open(path, "r", encoding="utf-8") as f:
+            m = _GENERATED_RE.search(f.read(65536))
+        # generated_at es hora local sin zona, como la de esta máquina
+        if m and _epoch(m.group(1)) is not None:
+            return _epoch(m.group(1))
+    return os.path.getmtime(path)
+
+class RefreshStore:
+    def __init__(self, path=REFRESH_DB):
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.commit()
+        self.conn.close()
+
+    def track(self, rows, now=None):
+        """Registra tweets (filas del scraper); los ya registrados se ignoran."""
+        now = now or time.time()
+        added = 0
+        for r in rows:
+            tid = tweet_id_from_permalink(r.get("permalink"))
+            posted = _epoch(r.get("timestamp") or r.get("ts_ec"))
+            if tid is None or posted is None:
+                continue
+            # La primera visita nunca se salta: un tweet viejo se visita ya
+            due = max(posted + REFRESH_AGES[0], now)
+            eng = _engagement(r)
+            velocity = eng / max((now - posted) / 3600, 1 / 60)
+            cur = self.conn.execute(
+                "INSERT OR IGNORE INTO tracked (tweet_id, permalink, posted_at, stage, due_at,"
+                " velocity, engagement, last_at) VALUES (?, ?, ?, 0, ?, ?, ?, ?)",
+                (tid, r["permalink"], posted, due, velocity, eng, posted))
+            added += cur.rowcount
+        self.conn.commit()
+        return added
+
+    def due(self, limit=REFRESH_BATCH, now=None):
+        """Vencidos, los de mayor velocidad primero."""
+        now = now or time.time()
+        return self.conn.execute(
+            "SELECT tweet_id, permalink FROM tracked WHERE due_at <= ?"
+            " ORDER BY velocity DESC, due_at LIMIT ?", (now, limit)).fetchall()
+
+    def next_due(self):
+        return self.conn.execute("SELECT MIN(due_at) FROM tracked").fetchone()[0]
+
+    def record(self, tweet_id, row, source, now=None):
+        """Anexa una instantánea y reprograma el tweet."""
+        now = now or time.time()
+        t = self.conn.execute(
+            "SELECT posted_at, stage, engagement, last_at FROM tracked WHERE tweet_id = ?",
+            (tweet_id,)).fetchone()
+        if t is None:
+            return False
+        posted, stage, last_eng, last_at = t
+        self.conn.execute(
+            "INSERT INTO snapshots (tweet_id, fetched_at, age_s, replies, retweets, likes,"
+            " quotes, views, source) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (tweet_id, now, now - posted, *(row.get(k) for k in METRIC_FIELDS), source))
+        if last_at is not None and now < last_at:
+            return True   # lectura más vieja que la última (--observe de un archivo antiguo)
+        eng = _engagement(row)
+        hours = max((now - (last_at or posted)) / 3600, 1 / 60)
+        stage, due = _next_stage(posted, now, stage)
+        self.conn.execute(
+            "UPDATE tracked SET stage = ?, due_at = ?, velocity = ?, engagement = ?,"
+            " last_at = ?, failures = 0 WHERE tweet_id = ?",
+            (stage, due, max(eng - last_eng, 0) / hours, eng, now, tweet_id))
+        return True
+
+    def failed(self, tweet_id, now=None):
+        now = now or time.time()
+        self.conn.execute("UPDATE tracked SET failures = failures + 1 WHERE tweet_id = ?",
+                          (tweet_id,))
+        n = self.conn.execute("SELECT failures FROM tracked WHERE tweet_id = ?",
+                              (tweet_id,)).fetchone()
+        if n and n[0] >= MAX_FAILURES:
+            self.conn.execute("UPDATE tracked SET due_at = NULL WHERE tweet_id = ?", (tweet_id,))
+        else:
+            # reintento más tarde, sin perder su turno por completo
+            self.conn.execute("UPDATE tracked SET due_at = ? WHERE tweet_id = ?",
+                              (now + 600, tweet_id))
+
+    def observe(self, rows, source, at):
+        """Instantáneas a partir de filas de otra corrida (sin navegador),
+        leídas en `at` (epoch del scrapeo, ver observed_at)."""
+        n = 0
+        for r in rows:
+            tid = tweet_id_from_permalink(r.get("permalink"))
+            if tid is not None and self.record(tid, r, source, now=at):
+                n += 1
+        self.conn.commit()
+        return n
+
+    def export(self, path):
+        cur = self.conn.execute(
+            "SELECT s.tweet_id, t.permalink, s.fetched_at, s.age_s, s.replies, s.retweets,"
+            " s.likes, s.quotes, s.views, s.source FROM snapshots s"
+            " JOIN tracked t USING (tweet_id) ORDER BY s.tweet_id, s.fetched_at")
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            w = csv.writer(f)
+            w.writerow([d[0] for d in cur.description])
+            w.writerows(cur)
+
+class Throttle:
+    """Intervalo mínimo global entre visitas, compartido por los workers."""
+
+    def __init__(self, per_hour=REFRESH_RATE):
+        self.interval = 3600 / per_hour if per_hour else 0
+        self._lock = threading.Lock()
+        self._next = time.monotonic()
+
+    def wait(self):
+        with self._lock:
+            slot = max(self._next, time.monotonic())
+            self._next = slot + self.interval
+        delay = slot - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+def fetch_metrics(driver, tweet_id, permalink, capture=None):
+    """Abre el permalink y devuelve la fila del tweet principal (o None)."""
+    if capture is not None:
+        driver.get_log("performance")  # descartar la visita anterior
+    driver.get(permalink)
+    deadline = time.monotonic() + DETAIL_TIMEOUT
+    if capture is not None:
+        while time.monotonic() < deadline:
+            for r in capture.poll(driver):
+                if str(r.get("tweet_id")) == str(tweet_id):
+                    return r
+            time.sleep(0.2)
+        return None
+    try:
+        WebDriverWait(driver, DETAIL_TIMEOUT).until(
+            EC.presence_of_element_located((By.CSS_SELECTOR, 'article[data-testid="tweet"]')))
+    except TimeoutException:
+        return None
+    for r in extract_visible_tweets(driver):
+        if tweet_id_from_permalink(r.get("permalink")) == tweet_id:
+            return r
+    return None
+
+class RefreshWorker(x_pool.SessionWorker):
+    """Sesión del pool que visita permalinks en vez de lanzar búsquedas.
+
+    `results` es una cola: el hilo principal es el único que escribe en SQLite."""
+
+    def __init__(self, wid, jobs, results, driver_path, headless, capture_network, throttle):
+        super().__init__(wid, jobs, results, driver_path, headless, capture_network)
+        self.throttle = throttle
+
+    def _run_job(self, job):
+        tweet_id, permalink = job
+        capture = (TimelineCapture("TweetDetail", parse=parse_tweet_detail)
+                   if self.capture_network else None)
+        for attempt in range(x_pool.MAX_RETRIES + 1):
+            try:
+                if self.driver is None or self.served >= PAGES_PER_SESSION:
+                    self._close()
+                    self._open()
+                self.throttle.wait()
+                row = fetch_metrics(self.driver, tweet_id, permalink, capture)
+                self.served += 1
+                self.results.put((tweet_id, row))
+                return
+            except WebDriverException as e:
+                print(f"[{self.name}] (BAD) {permalink}: {type(e).__name__}; reiniciando sesión")
+                self._close()
+        self.results.put((tweet_id, None))
+
+def run_due(store, workers=REFRESH_WORKERS, rate=REFRESH_RATE, limit=REFRESH_BATCH,
+            headless=True, capture_network=False):
+    """Visita los vencidos con un pool de sesiones; devuelve (ok, fallidos)."""
+    due = store.due(limit)
+    if not due:
+        return 0, 0
+    jobs = queue.Queue()
+    for job in due:
+        jobs.put(job)
+    results = queue.Queue()
+    throttle = Throttle(rate)
+    driver_path = resolve_driver_path()
+    source = "network" if capture_network else "dom"
+    pool = [RefreshWorker(i, jobs, results, driver_path, headless, capture_network, throttle)
+            for i in range(min(workers, len(due)))]
+    for w in pool:
+        w.start()
+    ok = bad = 0
+    t0 = time.monotonic()
+    while any(w.is_alive() for w in pool) or not results.empty():
+        try:
+            tweet_id, row = results.get(timeout=1)
+        except queue.Empty:
+            continue
+        if row is None:
+            store.failed(tweet_id)
+            bad += 1
+        else:
+            store.record(tweet_id, row, source)
+            ok += 1
+        if (ok + bad) % 50 == 0:
+            store.conn.commit()
+            rate_h = (ok + bad) / max(time.monotonic() - t0, 1e-9) * 3600
+            print(f"  [~] {ok + bad}/{len(due)} visitados ({rate_h:.0f}/h)")
+    store.conn.commit()
+    return ok, bad
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--db", default=REFRESH_DB)
+    ap.add_argument("--track", nargs="*", default=[], help="JSON/NDJSON/CSV con permalinks a seguir")
+    ap.add_argument("--observe", nargs="*", default=[],
+                    help="JSON/NDJSON/CSV de corridas posteriores: instantáneas sin navegador")
+    ap.add_argument("--run", action="store_true", help="visitar los vencidos")
+    ap.add_argument("--loop", action="store_true", help="con --run: seguir esperando vencimientos")
+    ap.add_argument("--workers", type=int, default=REFRESH_WORKERS)
+    ap.add_argument("--rate", type=int, default=REFRESH_RATE, help="visitas máx. por hora")
+    ap.add_argument("--batch", type=int, default=REFRESH_BATCH)
+    ap.add_argument("--network", action="store_true", help="leer el JSON TweetDetail")
+    ap.add_argument("--export", help="volcar las instantáneas a este CSV")
+    args = ap.parse_args()
+
+    store = RefreshStore(args.db)
+    try:
+        for path in args.track:
+            print(f"(TRACK) {path}: {store.track(iter_raw(path))} tweets nuevos")
+        for path in args.observe:
+            n = store.observe(iter_raw(path), path, observed_at(path))
+            print(f"(OBSERVE) {path}: {n} instantáneas")
+        while args.run:
+            if not has_auth_cookie():
+                raise SystemExit("(BAD) Sin sesión en x_cookies.json: corre antes x_crapy_json.py")
+            ok, bad = run_due(store, args.workers, args.rate, args.batch,
+                              capture_network=args.network)
+            print(f"(OK) {ok} refrescados, {bad} fallidos")
+            if not args.loop:
+                break
+            if ok + bad == 0:
+                nxt = store.next_due()
+                if nxt is None:
+                    print("(OK) Nada pendiente.")
+                    break
+                time.sleep(min(max(nxt - time.time(), 1), 600))
+        if args.export:
+            store.export(args.export)
+            print(f"(SAVE) Instantáneas en: {args.export}")
+    finally:
+        store.close()
+
+if __name__ == "__main__":
+    main()
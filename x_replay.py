@@ -0,0 +1,328 @@
+"""Grabación y reproducción offline de búsquedas de X para benchmarks.
+
+Una grabación es una carpeta con los artículos que fueron apareciendo en
+cada ronda de scroll (chunk_NNNN.html) y, si se capturó, el JSON
+SearchTimeline de cada página (timeline_NNNN.json). Un servidor HTTP local
+la sirve como una timeline con scroll infinito: go_to_search, el bucle de
+scroll, los extractores y la captura por CDP corren de punta a punta sin
+red (Chrome no resuelve ningún host salvo 127.0.0.1, así que las imágenes
+de pbs.twimg.com y demás recursos externos de los artículos fallan al
+instante en vez de bajarse del CDN).
+
+    python x_replay.py record "paro nacional lang:es" --rounds 40 --out recordings/paro
+    python x_replay.py from-html debug_x_search_source.html --out recordings/debug
+    python x_replay.py bench recordings/paro --strategies js dom network
+"""
+import argparse, json, os, re, resource, tempfile, threading, time
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+from x_crapy_json import (
+    build_driver, load_cookies, go_to_search, scrape_timeline, TimelineCapture,
+    RateLimiter, install_growth_observer, wait_for_timeline_growth, MAX_TWEETS
+)
+from x_metrics import METRICS
+from selenium.webdriver.common.by import By
+from selenium.webdriver.common.keys import Keys
+
+CHUNK_ARTICLES = 10      # artículos por chunk al importar un volcado HTML
+KEEP_MOUNTED   = 40      # celdas montadas a la vez (X virtualiza la lista)
+STRATEGIES     = ["js", "dom", "network"]
+# Todo host salvo el servidor local resuelve a "no existe": bench sin red
+OFFLINE_ARGS   = ["--host-resolver-rules=MAP * ~NOTFOUND , EXCLUDE 127.0.0.1"]
+
+# Artículos que aparecieron desde la última llamada (por permalink)
+NEW_ARTICLES_JS = r"""
+const seen = window.__recSeen || (window.__recSeen = new Set());
+const out = [];
+for (const art of document.querySelectorAll('article[data-testid="tweet"]')) {
+  const t = art.querySelector('time');
+  const key = (t && t.parentElement && t.parentElement.href) || art.innerText.slice(0, 200);
+  if (seen.has(key)) continue;
+  seen.add(key);
+  out.push(art.outerHTML);
+}
+return out;
+"""
+
+PAGE_TEMPLATE = """<!doctype html>
+<html><head><meta charset="utf-8">
+<base href="https://x.com/">
+<style>#tl > div { min-height: 320px; border-bottom: 1px solid #ddd; }</style>
+</head><body>
+<main role="main"><div aria-label="Timeline: Search timeline"><div id="tl">__FIRST__</div></div></main>
+<script>
+(() => {
+  const origin = "__ORIGIN__", total = __CHUNKS__, pages = __PAGES__, keep = __KEEP__;
+  let next = 1, page = 0, loading = false;
+  const tl = document.getElementById("tl");
+  // Las peticiones SearchTimeline hacen que la captura por CDP vea el JSON grabado
+  const timeline = () => { if (page < pages) fetch(origin + "/i/api/graphql/replay/SearchTimeline?page=" + (page++)); };
+  timeline();
+  async function more() {
+    if (loading || next >= total) return;
+    if (window.innerHeight + window.scrollY < document.body.scrollHeight - 200) return;
+    loading = true;
+    const html = await (await fetch(origin + "/chunk/" + (next++))).text();
+    tl.insertAdjacentHTML("beforeend", html);
+    timeline();
+    const cells = tl.children;
+    while (cells.length > keep) cells[0].remove();
+    loading = false;
+  }
+  window.addEventListener("scroll", more);
+})();
+</script></body></html>"""
+
+def _cell(article_html):
+    return f'<div data-testid="cellInnerDiv">{article_html}</div>'
+
+# ---------------------------------------------------------------- grabación
+
+class Recording:
+    def __init__(self, directory):
+        self.dir = directory
+        manifest = os.path.join(directory, "manifest.json")
+        self.manifest = {}
+        if os.path.exists(manifest):
+            with open(manifest, "r", encoding="utf-8") as f:
+                self.manifest = json.load(f)
+
+    @property
+    def chunks(self):
+        return self.manifest.get("chunks", 0)
+
+    @property
+    def pages(self):
+        return self.manifest.get("timeline_pages", 0)
+
+    @property
+    def query(self):
+        return self.manifest.get("query", "")
+
+    def chunk(self, i):
+        with open(os.path.join(self.dir, f"chunk_{i:04d}.html"), "r", encoding="utf-8") as f:
+            return f.read()
+
+    def timeline(self, i):
+        with open(os.path.join(self.dir, f"timeline_{i:04d}.json"), "rb") as f:
+            return f.read()
+
+def _write_recording(directory, query, chunks, payloads):
+    os.makedirs(directory, exist_ok=True)
+    for i, articles in enumerate(chunks):
+        with open(os.path.join(directory, f"chunk_{i:04d}.html"), "w", encoding="utf-8") as f:
+            f.write("\n".join(_cell(a) for a in articles))
+    for i, payload in enumerate(payloads):
+        with open(os.path.join(directory, f"timeline_{i:04d}.json"), "w", encoding="utf-8") as f:
+            json.dump(payload, f, ensure_ascii=False)
+    with open(os.path.join(directory, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump({"query": query, "created_at": datetime.now().isoformat(),
+                   "chunks": len(chunks), "timeline_pages": len(payloads),
+                   "articles": sum(len(c) for c in chunks)}, f, indent=2)
+
+def record(query, directory, rounds=40):
+    """Graba una búsqueda real (requiere x_cookies.json con sesión)."""
+    payloads = []
+    driver = build_driver(headless=True, capture_network=True)
+    capture = TimelineCapture(on_payload=payloads.append)
+    chunks = []
+    try:
+        load_cookies(driver)
+        go_to_search(driver, query, timeout=60)
+        growth = install_growth_observer(driver)
+        body = driver.find_element(By.TAG_NAME, "body")
+        for _ in range(rounds):
+            capture.poll(driver)
+            new = driver.execute_script(NEW_ARTICLES_JS) or []
+            if new:
+                chunks.append(new)
+            body.send_keys(Keys.END)
+            new_growth = wait_for_timeline_growth(driver, growth)
+            if new_growth == growth and not new:
+                break
+            growth = new_growth
+        capture.poll(driver)
+    finally:
+        driver.quit()
+    _write_recording(directory, query, chunks, payloads)
+    print(f"(REC) {sum(map(len, chunks))} artículos en {len(chunks)} chunks, "
+          f"{len(payloads)} páginas SearchTimeline -> {directory}")
+
+def from_html(html_path, directory, query="debug"):
+    """Crea una grabación a partir de un volcado de página (debug_x_search_source.html)."""
+    with open(html_path, "r", encoding="utf-8") as f:
+        html = re.sub(r"<script\b.*?</script>", "", f.read(), flags=re.S | re.I)
+    fd, tmp = tempfile.mkstemp(suffix=".html")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        f.write(html)
+    driver = build_driver(headless=True, profile_dir=False)
+    try:
+        driver.get("file://" + os.path.abspath(tmp))
+        articles = driver.execute_script(NEW_ARTICLES_JS) or []
+    finally:
+        driver.quit()
+        os.remove(tmp)
+    chunks = [articles[i:i + CHUNK_ARTICLES] for i in range(0, len(articles), CHUNK_ARTICLES)]
+    _write_recording(directory, query, chunks, [])
+    print(f"(REC) {len(articles)} artículos en {len(chunks)} chunks -> {directory}")
+
+# ---------------------------------------------------------------- reproducción
+
+def serve(directory, host="127.0.0.1", port=0):
+    """Sirve la grabación; devuelve (server, base_url)."""
+    rec = Recording(directory)
+
+    class Handler(BaseHTTPRequestHandler):
+        def _send(self, body, ctype):
+            self.send_response(200)
+            self.send_header("Content-Type", ctype)
+            self.send_header("Content-Length", str(len(body)))
+            self.send_header("Access-Control-Allow-Origin", "*")
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            try:
+                if url.path == "/search":
+                    origin = f"http://{self.server.server_address[0]}:{self.server.server_address[1]}"
+                    page = (PAGE_TEMPLATE
+                            .replace("__FIRST__", rec.chunk(0) if rec.chunks else "")
+                            .replace("__ORIGIN__", origin)
+                            .replace("__CHUNKS__", str(rec.chunks))
+                            .replace("__PAGES__", str(rec.pages))
+                            .replace("__KEEP__", str(KEEP_MOUNTED)))
+                    return self._send(page.encode("utf-8"), "text/html; charset=utf-8")
+                if url.path.startswith("/chunk/"):
+                    i = int(url.path.rsplit("/", 1)[1])
+                    return self._send(rec.chunk(i).encode("utf-8"), "text/html; charset=utf-8")
+                if url.path.endswith("/SearchTimeline"):
+                    i = int(parse_qs(url.query).get("page", ["0"])[0])
+                    return self._send(rec.timeline(i), "application/json")
+            except (OSError, ValueError):
+                pass
+            self.send_error(404)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+def _peak_rss_kb(root_pid):
+    """Suma del pico de RSS (VmHWM) de un árbol de procesos (Linux)."""
+    children = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat", "r") as f:
+                ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        children.setdefault(ppid, []).append(int(entry))
+    total, stack = 0, [root_pid]
+    while stack:
+        pid = stack.pop()
+        stack.extend(children.get(pid, []))
+        try:
+            with open(f"/proc/{pid}/status", "r") as f:
+                for line in f:
+                    if line.startswith("VmHWM:"):
+                        total += int(line.split()[1])
+        except OSError:
+            pass
+    return total
+
+class _TimedIndex(dict):
+    """Índice dict de dedup_merge que anota cuándo entró la última fila nueva."""
+    last_added = None
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self.last_added = time.perf_counter()
+
+def bench(directory, strategy, max_tweets=MAX_TWEETS):
+    """Corre una estrategia contra la grabación y devuelve sus métricas.
+
+    El tiempo se mide hasta el último tweet nuevo: la cola fija con la que
+    scrape_timeline confirma el final (MAX_IDLE_ROUNDS x GROWTH_TIMEOUT) se
+    informa aparte en tail_seconds y no entra en tweets/s."""
+    server, base_url = serve(directory)
+    rec = Recording(directory)
+    network = strategy == "network"
+    driver = build_driver(headless=True, capture_network=network,
+                          profile_dir=False, block_media=False, extra_args=OFFLINE_ARGS)
+    try:
+        METRICS.reset()
+        t_load = time.perf_counter()
+        go_to_search(driver, rec.query or "replay", timeout=30, base_url=base_url)
+        t0 = time.perf_counter()
+        by_key = _TimedIndex()
+        scrape_timeline(driver, by_key, max_tweets,
+                        capture=TimelineCapture() if network else None,
+                        limiter=RateLimiter(0, 0),
+                        extract_mode=None if network else strategy)
+        t_end = time.perf_counter()
+        dt = (by_key.last_added or t_end) - t0
+        s = METRICS.summary()
+        chrome_kb = _peak_rss_kb(driver.service.process.pid)
+    finally:
+        driver.quit()
+        server.shutdown()
+    py_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    tweets = len(by_key)
+    return {
+        "strategy": strategy,
+        "tweets": tweets,
+        "seconds": round(dt, 3),
+        "tail_seconds": round(t_end - t0 - dt, 3),
+        "load_seconds": round(t0 - t_load, 3),
+        "tweets_per_s": round(tweets / dt, 2) if dt else 0.0,
+        "webdriver_calls_per_tweet": round(s["webdriver_calls"] / tweets, 2) if tweets else None,
+        "peak_rss_mb_python": round(py_kb / 1024, 1),
+        "peak_rss_mb_chrome": round(chrome_kb / 1024, 1),
+    }
+
+def main():
+    ap = argparse.ArgumentParser()
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    r = sub.add_parser("record")
+    r.add_argument("query")
+    r.add_argument("--out", required=True)
+    r.add_argument("--rounds", type=int, default=40)
+    h = sub.add_parser("from-html")
+    h.add_argument("html")
+    h.add_argument("--out", required=True)
+    b = sub.add_parser("bench")
+    b.add_argument("recording")
+    b.add_argument("--strategies", nargs="+", default=STRATEGIES, choices=STRATEGIES)
+    b.add_argument("--max", type=int, default=MAX_TWEETS)
+    b.add_argument("--json", help="guardar resultados en este archivo")
+    args = ap.parse_args()
+
+    if args.cmd == "record":
+        record(args.query, args.out, args.rounds)
+    elif args.cmd == "from-html":
+        from_html(args.html, args.out)
+    else:
+        results = []
+        for strategy in args.strategies:
+            if strategy == "network" and not Recording(args.recording).pages:
+                print("(SKIP) network: la grabación no tiene JSON SearchTimeline")
+                continue
+            res = bench(args.recording, strategy, args.max)
+            results.append(res)
+            print(f"{res['strategy']:>8}: {res['tweets']:>5} tweets  {res['tweets_per_s']:>8} tweets/s  "
+                  f"(+{res['tail_seconds']}s de cola)  "
+                  f"{res['webdriver_calls_per_tweet']} llamadas/tweet  "
+                  f"RSS py {res['peak_rss_mb_python']} MB / chrome {res['peak_rss_mb_chrome']} MB")
+        if args.json:
+            with open(args.json, "w", encoding="utf-8") as f:
+                json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+"""Partición de una búsqueda en ventanas since:/until: para superar el techo
+de una sola timeline "Latest".
+
+Las ventanas se recorren de la más reciente a la más antigua y su tamaño se
+ajusta con la densidad (tweets/hora) observada en la ventana anterior, de
+modo que cada shard rinda cerca de `per_shard` tweets. La deduplicación es
+global (un solo índice para todas las ventanas).
+
+    python x_shards.py "paro nacional lang:es" --since 2025-05-01 --until 2025-06-01
+    python x_shards.py "paro nacional lang:es" --since 2025-05-01 --until 2025-06-01 --workers 3
+"""
+import argparse, re
+from datetime import datetime, timedelta, timezone
+
+from x_crapy_json import (
+    build_driver, load_cookies, has_auth_cookie, go_to_search, scrape_timeline,
+    compact_ndjson, to_json, query_slug, TimelineStalled, SAVE_CSV, DEDUP_INDEX
+)
+from x_dedup import index_for
+from x_sinks import StreamSink
+
+PER_SHARD     = 400                     # tweets objetivo por ventana
+INITIAL_HOURS = 24.0                    # tamaño de la primera ventana
+MIN_HOURS     = 1.0
+MAX_HOURS     = 24.0 * 7
+MAX_STALLS    = 3                       # ventanas atascadas seguidas antes de abandonar
+
+def _parse_day(s):
+    return datetime.fromisoformat(s).replace(tzinfo=timezone.utc)
+
+def format_bound(dt):
+    """Fecha para since:/until:; con hora si no cae a medianoche (UTC)."""
+    if (dt.hour, dt.minute, dt.second) == (0, 0, 0):
+        return dt.strftime("%Y-%m-%d")
+    return dt.strftime("%Y-%m-%d_%H:%M:%S_UTC")
+
+def shard_query(query, since, until):
+    base = re.sub(r"\s*\b(since|until):\S+", "", query).strip()
+    return f"{base} since:{format_bound(since)} until:{format_bound(until)}"
+
+class AdaptivePlanner:
+    """Genera ventanas [since, until) hacia atrás, dimensionadas por densidad."""
+
+    def __init__(self, since, until, per_shard=PER_SHARD, initial_hours=INITIAL_HOURS,
+                 min_hours=MIN_HOURS, max_hours=MAX_HOURS):
+        self.since = since
+        self.cursor = until
+        self.per_shard = per_shard
+        self.hours = initial_hours
+        self.min_hours = min_hours
+        self.max_hours = max_hours
+
+    def next_window(self):
+        if self.cursor <= self.since:
+            return None
+        start = max(self.since, self.cursor - timedelta(hours=self.hours))
+        return start, self.cursor
+
+    def record(self, window, count, reached=None):
+        """Informa cuántos tweets dio la ventana y ajusta la siguiente.
+
+        `reached` es el timestamp más antiguo alcanzado. Si la ventana se
+        cortó por el tope por shard antes de llegar a su inicio, la parte no
+        recorrida queda para la siguiente ventana en vez de saltarse."""
+        start, end = window
+        if reached is None or reached <= start:
+            reached = start
+        elif reached >= end:  # todo en el mismo segundo: avanzar al menos min_hours
+            reached = max(start, end - timedelta(hours=self.min_hours))
+        hours = (end - reached).total_seconds() / 3600
+        if count and hours > 0:
+            self.hours = self.per_shard / (count / hours)
+        else:
+            self.hours = (end - start).total_seconds() / 3600 * 2
+        self.hours = min(self.max_hours, max(self.min_hours, self.hours))
+        self.cursor = reached
+
+class _WindowProgress:
+    """Misma interfaz que Checkpoint (observe/maybe_save) para que
+    scrape_timeline informe hasta qué timestamp llegó una ventana."""
+
+    def __init__(self):
+        self.oldest = None
+
+    def observe(self, rows):
+        for r in rows:
+            ts = r.get("timestamp")
+            if ts and (self.oldest is None or ts < self.oldest):
+                self.oldest = ts
+
+    def maybe_save(self, by_key):
+        pass
+
+    @property
+    def reached(self):
+        if not self.oldest:
+            return None
+        return datetime.fromisoformat(self.oldest.replace("Z", "+00:00"))
+
+def plan_fixed(since, until, hours):
+    """Ventanas de tamaño fijo (para ejecución en paralelo)."""
+    windows, end = [], until
+    while end > since:
+        start = max(since, end - timedelta(hours=hours))
+        windows.append((start, end))
+        end = start
+    return windows
+
+def run_sequential(driver, query, since, until, per_shard=PER_SHARD, sink=None):
+    """Recorre las ventanas adaptativas en un solo driver ya autenticado."""
+    planner = AdaptivePlanner(since, until, per_shard=per_shard)
+    by_key = index_for(DEDUP_INDEX, query_slug(query)) if sink is not None else {}
+    stalls = 0
+    try:
+        while True:
+            window = planner.next_window()
+            if window is None:
+                break
+            q = shard_query(query, *window)
+            before = len(by_key)
+            print(f"(SHARD) {q}")
+            go_to_search(driver, q, timeout=60)
+            progress = _WindowProgress()
+            try:
+                scrape_timeline(driver, by_key, before + per_shard, sink=sink, checkpoint=progress)
+                stalls = 0
+            except TimelineStalled as e:
+                # Lo alcanzado se da por hecho y el resto de la ventana se vuelve a
+                # pedir como búsqueda nueva; tras MAX_STALLS seguidas, la sesión no sirve.
+                stalls += 1
+                print(f"  [!] Ventana atascada ({e.msg}); {stalls}/{MAX_STALLS}")
+                if stalls >= MAX_STALLS:
+                    raise
+                if progress.reached is not None:
+                    planner.record(window, len(by_key) - before, progress.reached)
+                continue
+            count = len(by_key) - before
+            # Solo si se llenó el tope la ventana puede haber quedado a medias
+            planner.record(window, count, progress.reached if count >= per_shard else None)
+            print(f"  [=] {count} nuevos en la ventana; siguiente: {planner.hours:.1f} h")
+    finally:
+        # sqlite: confirma el último lote (< commit_every); bloom: escribe el filtro
+        if hasattr(by_key, "close"):
+            by_key.close()
+    return by_key
+
+def run_parallel(query, since, until, hours, per_shard=PER_SHARD, workers=3):
+    """Ventanas fijas repartidas en el pool de x_pool; devuelve filas deduplicadas."""
+    from x_pool import run_queries, merge_results
+    windows = plan_fixed(since, until, hours)
+    jobs = [{"query": shard_query(query, *w), "max": per_shard} for w in windows]
+    return merge_results(run_queries(jobs, workers=workers))
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("query")
+    ap.add_argument("--since", required=True, help="YYYY-MM-DD (UTC)")
+    ap.add_argument("--until", required=True, help="YYYY-MM-DD (UTC, exclusivo)")
+    ap.add_argument("--per-shard", type=int, default=PER_SHARD)
+    ap.add_argument("--workers", type=int, default=0,
+                    help="0 = secuencial adaptativo; N = N sesiones con ventanas fijas")
+    ap.add_argument("--hours", type=float, default=INITIAL_HOURS,
+                    help="tamaño de ventana en modo paralelo")
+    args = ap.parse_args()
+    since, until = _parse_day(args.since), _parse_day(args.until)
+
+    if args.workers:
+        rows = run_parallel(args.query, since, until, args.hours,
+                            per_shard=args.per_shard, workers=args.workers)
+        print(f"(OK) {len(rows)} tweets -> {to_json(rows, args.query, prefix='x_tweets_shards')}")
+        return
+
+    if not has_auth_cookie():
+        raise RuntimeError("(BAD) No hay auth_token en x_cookies.json; "
+                           "ejecuta x_crapy_json.py una vez para iniciar sesión.")
+    driver = build_driver(headless=True)
+    sink = StreamSink(prefix="x_tweets_shards", csv_out=SAVE_CSV)
+    try:
+        load_cookies(driver)
+        run_sequential(driver, args.query, since, until, per_shard=args.per_shard, sink=sink)
+    finally:
+        sink.close()
+        try:
+            driver.quit()
+        except Exception:
+            pass
+    print(f"(OK) {sink.count} tweets -> {compact_ndjson(sink.ndjson_path, args.query)}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""Escritura incremental de tweets (NDJSON / CSV) durante el scroll.
+
+Cada lote nuevo que sale de dedup_merge se anexa a disco en cuanto se
+encuentra, así un Chrome caído en el tweet 900 no se lleva los 899
+anteriores y la memoria no crece con el tamaño de la corrida. Al final,
+compact_ndjson produce el JSON con el sobre de siempre
+(query, generated_at, count, tweets) sin cargar todo en memoria.
+"""
+import csv, json, os, time
+from datetime import datetime
+
+CSV_FIELDS = [
+    "display_name","handle","text","timestamp","permalink","replies","retweets","likes"
+]
+FSYNC_INTERVAL = 5.0   # segundos entre fsync; 0 = fsync en cada lote
+
+class StreamSink:
+    """Anexa filas a <prefix>_<stamp>.ndjson (y .csv si csv_out=True)."""
+
+    def __init__(self, prefix="x_tweets", csv_out=True, fsync_interval=FSYNC_INTERVAL,
+                 ndjson_path=None, extra=None):
+        # ndjson_path permite reabrir (en modo append) la salida de una corrida anterior
+        stamp = datetime.now().strftime("%Y%m%d_%H%M")
+        self.ndjson_path = ndjson_path or f"{prefix}_{stamp}.ndjson"
+        base = os.path.splitext(self.ndjson_path)[0]
+        self.csv_path = base + ".csv" if csv_out else None
+        self.fsync_interval = fsync_interval
+        self.count = 0
+        self.closed = False
+        self.extra = list(extra or [])   # otros sinks (p. ej. ParquetSink) que reciben lo mismo
+        self._last_sync = time.monotonic()
+        self._nd = open(self.ndjson_path, "a", encoding="utf-8")
+        self._csv = None
+        self._writer = None
+        if self.csv_path:
+            new_file = not os.path.exists(self.csv_path) or os.path.getsize(self.csv_path) == 0
+            self._csv = open(self.csv_path, "a", newline="", encoding="utf-8")
+            self._writer = csv.DictWriter(self._csv, fieldnames=CSV_FIELDS, extrasaction="ignore")
+            if new_file:
+                self._writer.writeheader()
+
+    def write(self, rows):
+        for r in rows:
+            self._nd.write(json.dumps(r, ensure_ascii=False) + "\n")
+            if self._writer:
+                self._writer.writerow(r)
+            self.count += 1
+        for sink in self.extra:
+            sink.write(rows)
+        self._nd.flush()
+        if self._csv:
+            self._csv.flush()
+        if time.monotonic() - self._last_sync >= self.fsync_interval:
+            self.sync()
+
+    def sync(self):
+        for fh in (self._nd, self._csv):
+            if fh:
+                fh.flush()
+                os.fsync(fh.fileno())
+        self._last_sync = time.monotonic()
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        self.sync()
+        for fh in (self._nd, self._csv):
+            if fh:
+                fh.close()
+        for sink in self.extra:
+            sink.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def iter_ndjson(path):
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError:
+                # Última línea truncada por una caída: se ignora
+                continue
+
+def compact_ndjson(ndjson_path, query, out_path=None):
+    """Convierte el NDJSON en el JSON de to_json, fila a fila (memoria constante)."""
+    out_path = out_path or os.path.splitext(ndjson_path)[0] + ".json"
+    count = sum(1 for _ in iter_ndjson(ndjson_path))
+    with open(out_path, "w", encoding="utf-8") as f:
+        f.write("{\n")
+        f.write(f'  "query": {json.dumps(query, ensure_ascii=False)},\n')
+        f.write(f'  "generated_at": {json.dumps(datetime.now().isoformat())},\n')
+        f.write(f'  "count": {count},\n')
+        f.write('  "tweets": [')
+        for i, row in enumerate(iter_ndjson(ndjson_path)):
+            body = json.dumps(row, ensure_ascii=False, indent=2).replace("\n", "\n    ")
+            f.write(("," if i else "") + "\n    " + body)
+        f.write("\n  ]\n}" if count else "]\n}")
+    return out_path
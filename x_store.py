@@ -0,0 +1,291 @@
+"""Almacén local de tweets en SQLite, con índices para los análisis.
+
+Una sola base (STORE_DB) en vez de decenas de x_tweets_*: clave = ID del
+tweet, índices por handle, fecha y hashtag, y FTS5 sobre el texto. Un
+upsert de un tweet ya guardado actualiza sus métricas (las columnas que la
+fila nueva no trae, p. ej. views desde el DOM, se conservan).
+
+- StoreSink: compatible con StreamSink (write/sync/close), el scraper lo
+  usa como `extra` (STORE_OUTPUT en x_crapy_json o --store).
+- Consultas para los scripts de análisis: hashtag_counts (narrativa
+  emergente), iter_tweets (detección de cuentas), tweets_per_handle, search.
+
+Las horas se guardan en segundos epoch UTC; los cubetazos por día/hora se
+hacen en hora de Ecuador, que no tiene horario de verano (UTC-5 fijo).
+
+    python x_store.py ingest dataset_limpio.csv "x_tweets_*.ndjson"
+    python x_store.py handles --top 20
+    python x_store.py search "paro AND nacional"
+"""
+import argparse, glob, json, re, sqlite3, time
+from datetime import datetime, timezone
+
+from x_dedup import tweet_id_from_permalink
+
+STORE_DB      = "x_tweets.sqlite"
+STORE_BATCH   = 2000           # filas por transacción
+EC_OFFSET     = -5 * 3600      # America/Guayaquil: UTC-5 todo el año
+HASHTAG_RE    = re.compile(r"#(\w+)")
+BUCKETS       = {"day": 86400, "hour": 3600}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tweets (
+    tweet_id       INTEGER PRIMARY KEY,
+    handle         TEXT NOT NULL,
+    display_name   TEXT,
+    text           TEXT NOT NULL,
+    ts             INTEGER,            -- epoch UTC
+    permalink      TEXT,
+    replies        INTEGER, retweets INTEGER, likes INTEGER, quotes INTEGER, views INTEGER,
+    in_reply_to_id INTEGER,
+    quoted_id      INTEGER,
+    urls           TEXT,               -- JSON: URLs expandidas
+    media          TEXT,               -- JSON: [{"type", "url"}]
+    reply_to       TEXT,               -- JSON: ["@cuenta", ...]
+    first_seen     REAL NOT NULL,
+    updated_at     REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS tweets_handle_ts ON tweets(handle, ts);
+CREATE INDEX IF NOT EXISTS tweets_ts ON tweets(ts);
+CREATE TABLE IF NOT EXISTS hashtags (
+    tag      TEXT NOT NULL,            -- en minúsculas, con '#'
+    ts       INTEGER NOT NULL,
+    tweet_id INTEGER NOT NULL,
+    PRIMARY KEY (tag, ts, tweet_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS hashtags_ts ON hashtags(ts, tag);
+CREATE VIRTUAL TABLE IF NOT EXISTS tweets_fts USING fts5(
+    text, content='tweets', content_rowid='tweet_id'
+);
+CREATE TRIGGER IF NOT EXISTS tweets_ai AFTER INSERT ON tweets BEGIN
+    INSERT INTO tweets_fts(rowid, text) VALUES (new.tweet_id, new.text);
+END;
+CREATE TRIGGER IF NOT EXISTS tweets_ad AFTER DELETE ON tweets BEGIN
+    INSERT INTO tweets_fts(tweets_fts, rowid, text) VALUES ('delete', old.tweet_id, old.text);
+END;
+CREATE TRIGGER IF NOT EXISTS tweets_au AFTER UPDATE OF text ON tweets BEGIN
+    INSERT INTO tweets_fts(tweets_fts, rowid, text) VALUES ('delete', old.tweet_id, old.text);
+    INSERT INTO tweets_fts(rowid, text) VALUES (new.tweet_id, new.text);
+END;
+"""
+
+UPSERT = """
+INSERT INTO tweets (tweet_id, handle, display_name, text, ts, permalink, replies, retweets,
+                    likes, quotes, views, in_reply_to_id, quoted_id, urls, media, reply_to,
+                    first_seen, updated_at)
+VALUES (:tweet_id, :handle, :display_name, :text, :ts, :permalink, :replies, :retweets,
+        :likes, :quotes, :views, :in_reply_to_id, :quoted_id, :urls, :media, :reply_to,
+        :now, :now)
+ON CONFLICT(tweet_id) DO UPDATE SET
+    in_reply_to_id = COALESCE(excluded.in_reply_to_id, in_reply_to_id),
+    quoted_id  = COALESCE(excluded.quoted_id, quoted_id),
+    urls       = COALESCE(excluded.urls, urls),
+    media      = COALESCE(excluded.media, media),
+    reply_to   = COALESCE(excluded.reply_to, reply_to),
+    replies    = COALESCE(excluded.replies, replies),
+    retweets   = COALESCE(excluded.retweets, retweets),
+    likes      = COALESCE(excluded.likes, likes),
+    quotes     = COALESCE(excluded.quotes, quotes),
+    views      = COALESCE(excluded.views, views),
+    updated_at = excluded.updated_at
+"""
+
+def _epoch(row):
+    """Segundos UTC desde `timestamp` (scraper) o `ts_ec` (CSV limpio)."""
+    ts = row.get("timestamp") or row.get("ts_ec")
+    if not ts:
+        return None
+    try:
+        dt = datetime.fromisoformat(str(ts).replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return int(dt.timestamp())
+
+def _int_or_none(v):
+    try:
+        return int(v)
+    except (TypeError, ValueError):
+        return None
+
+def _json_list(v):
+    # None = la fila no trae el campo (p. ej. CSV limpio): no pisa lo guardado
+    if v is None or v == "":
+        return None
+    return v if isinstance(v, str) else json.dumps(v, ensure_ascii=False)
+
+def _record(row, now):
+    tid = row.get("tweet_id") or tweet_id_from_permalink(row.get("permalink"))
+    if not tid:
+        return None
+    return {
+        "tweet_id": int(tid),
+        "handle": row.get("handle") or "",
+        "display_name": row.get("display_name"),
+        "text": row.get("text") or "",
+        "ts": _epoch(row),
+        "permalink": row.get("permalink"),
+        "replies": _int_or_none(row.get("replies")),
+        "retweets": _int_or_none(row.get("retweets")),
+        "likes": _int_or_none(row.get("likes")),
+        "quotes": _int_or_none(row.get("quotes")),
+        "views": _int_or_none(row.get("views")),
+        "in_reply_to_id": _int_or_none(row.get("in_reply_to_id")),
+        "quoted_id": _int_or_none(row.get("quoted_id")),
+        "urls": _json_list(row.get("urls")),
+        "media": _json_list(row.get("media")),
+        "reply_to": _json_list(row.get("reply_to")),
+        "now": now,
+    }
+
+class TweetStore:
+    def __init__(self, path=STORE_DB):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        # Bases creadas antes de guardar enlaces/medios: añadir las columnas
+        cols = {r[1] for r in self.conn.execute("PRAGMA table_info(tweets)")}
+        for col in ("urls", "media", "reply_to"):
+            if col not in cols:
+                self.conn.execute(f"ALTER TABLE tweets ADD COLUMN {col} TEXT")
+
+    def upsert(self, rows):
+        """Inserta o actualiza métricas; devuelve cuántas filas tenían ID."""
+        now = time.time()
+        recs = [r for r in (_record(row, now) for row in rows) if r is not None]
+        if not recs:
+            return 0
+        with self.conn:
+            self.conn.executemany(UPSERT, recs)
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO hashtags (tag, ts, tweet_id) VALUES (?, ?, ?)",
+                [("#" + t.lower(), r["ts"], r["tweet_id"])
+                 for r in recs if r["ts"] is not None
+                 # una vez por tweet: la misma regla que narrativa_emergente.extract_hashtags
+                 for t in set(HASHTAG_RE.findall(r["text"]))])
+        return len(recs)
+
+    def close(self):
+        self.conn.commit()
+        self.conn.execute("PRAGMA optimize")   # estadísticas para que el planificador use los índices
+        self.conn.close()
+
+    def __len__(self):
+        return self.conn.execute("SELECT COUNT(*) FROM tweets").fetchone()[0]
+
+    # ---- consultas para los análisis ----
+    def hashtag_counts(self, gran="day", since=None):
+        """Filas (bucket_epoch_local, hashtag, freq) agregadas en SQL.
+
+        bucket_epoch_local es el inicio del día/hora en hora de Ecuador,
+        expresado como epoch UTC."""
+        size = BUCKETS[gran]
+        sql = ("SELECT ((ts + :off) / :size) * :size - :off AS bucket, tag, COUNT(*)"
+               " FROM hashtags WHERE ts IS NOT NULL")
+        if since is not None:
+            sql += " AND ts >= :since"
+        sql += " GROUP BY bucket, tag"
+        return self.conn.execute(sql, {"off": EC_OFFSET, "size": size, "since": since}).fetchall()
+
+    def iter_tweets(self, columns=("handle", "text", "ts"), chunksize=100_000, since=None):
+        """Lotes de tuplas (por defecto handle, text, ts) sin cargar todo."""
+        sql = f"SELECT {', '.join(columns)} FROM tweets"
+        if since is not None:
+            sql += " WHERE ts >= ?"
+        cur = self.conn.execute(sql, () if since is None else (since,))
+        while True:
+            rows = cur.fetchmany(chunksize)
+            if not rows:
+                return
+            yield rows
+
+    def tweets_per_handle(self, top=20):
+        return self.conn.execute(
+            "SELECT handle, COUNT(*) AS n, MIN(ts), MAX(ts) FROM tweets"
+            " GROUP BY handle ORDER BY n DESC LIMIT ?", (top,)).fetchall()
+
+    def search(self, match, limit=50):
+        """Búsqueda de texto completo (sintaxis FTS5: AND, OR, NEAR, "frase", prefijo*)."""
+        return self.conn.execute(
+            "SELECT t.tweet_id, t.handle, t.ts, t.text FROM tweets_fts f"
+            " JOIN tweets t ON t.tweet_id = f.rowid WHERE tweets_fts MATCH ?"
+            " ORDER BY rank LIMIT ?", (match, limit)).fetchall()
+
+class StoreSink:
+    """Sink compatible con StreamSink que hace upsert en TweetStore por lotes."""
+
+    def __init__(self, path=STORE_DB, batch_rows=STORE_BATCH):
+        self.store = TweetStore(path)
+        self.batch_rows = batch_rows
+        self.count = 0
+        self.closed = False
+        self._buf = []
+
+    def write(self, rows):
+        self._buf.extend(rows)
+        self.count += len(rows)
+        if len(self._buf) >= self.batch_rows:
+            self.sync()
+
+    def sync(self):
+        if self._buf:
+            self.store.upsert(self._buf)
+            self._buf = []
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        self.sync()
+        self.store.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def _fmt_ts(ts):
+    return datetime.fromtimestamp(ts + EC_OFFSET, timezone.utc).strftime("%Y-%m-%d %H:%M") if ts else "-"
+
+def main():
+    from limpieza import iter_raw
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--db", default=STORE_DB)
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    i = sub.add_parser("ingest", help="cargar salidas del scraper o el CSV limpio")
+    i.add_argument("inputs", nargs="+")
+    h = sub.add_parser("handles", help="tweets por cuenta")
+    h.add_argument("--top", type=int, default=20)
+    s = sub.add_parser("search", help="búsqueda FTS5 en el texto")
+    s.add_argument("match")
+    s.add_argument("--limit", type=int, default=20)
+    args = ap.parse_args()
+
+    store = TweetStore(args.db)
+    try:
+        if args.cmd == "ingest":
+            for path in sorted({p for pat in args.inputs for p in glob.glob(pat)}):
+                batch, n = [], 0
+                for row in iter_raw(path):
+                    batch.append(row)
+                    if len(batch) >= STORE_BATCH:
+                        n += store.upsert(batch)
+                        batch = []
+                n += store.upsert(batch)
+                print(f"(INGEST) {path}: {n} tweets")
+            print(f"(OK) {len(store)} tweets en {args.db}")
+        elif args.cmd == "handles":
+            for handle, n, first, last in store.tweets_per_handle(args.top):
+                print(f"{n:>7}  {handle:<24} {_fmt_ts(first)} .. {_fmt_ts(last)}")
+        else:
+            for tid, handle, ts, text in store.search(args.match, args.limit):
+                print(f"{_fmt_ts(ts)}  {handle:<20} {text[:120]}")
+    finally:
+        store.close()
+
+if __name__ == "__main__":
+    main()
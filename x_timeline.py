@@ -0,0 +1,179 @@
+"""Parser de las respuestas GraphQL SearchTimeline (y TweetDetail) de X.
+
+No depende de Selenium: recibe el JSON ya decodificado (capturado por CDP o
+leído de un fixture grabado) y devuelve filas con la misma forma que
+extract_visible_tweets, más los campos que el DOM no da con exactitud.
+"""
+from datetime import datetime, timezone
+
+TWITTER_TS_FMT = "%a %b %d %H:%M:%S %z %Y"
+
+def twitter_ts_to_iso(created_at):
+    """'Sat May 31 13:12:11 +0000 2025' -> '2025-05-31T13:12:11.000Z'
+    (mismo formato que el atributo datetime de <time> en el DOM)."""
+    if not created_at:
+        return None
+    try:
+        dt = datetime.strptime(created_at, TWITTER_TS_FMT).astimezone(timezone.utc)
+    except ValueError:
+        return None
+    return dt.strftime("%Y-%m-%dT%H:%M:%S.000Z")
+
+def _unwrap(result):
+    # TweetWithVisibilityResults envuelve al tweet real en "tweet"
+    if not isinstance(result, dict):
+        return None
+    if result.get("__typename") == "TweetWithVisibilityResults":
+        result = result.get("tweet") or {}
+    if "legacy" not in result:
+        return None
+    return result
+
+def _user(result):
+    user = (((result.get("core") or {}).get("user_results") or {}).get("result")) or {}
+    legacy = user.get("legacy") or {}
+    core = user.get("core") or {}
+    # X movió screen_name/name de legacy a core en 2025; aceptamos ambos
+    screen_name = core.get("screen_name") or legacy.get("screen_name") or ""
+    name = core.get("name") or legacy.get("name") or ""
+    return screen_name, name
+
+def _full_text(result):
+    note = (((result.get("note_tweet") or {}).get("note_tweet_results") or {})
+            .get("result") or {})
+    return note.get("text") or result["legacy"].get("full_text") or ""
+
+def _to_int(v):
+    try:
+        return int(v)
+    except (TypeError, ValueError):
+        return 0
+
+def _int_or_none(v):
+    try:
+        return int(v)
+    except (TypeError, ValueError):
+        return None
+
+def _dedup(seq):
+    return list(dict.fromkeys(x for x in seq if x))
+
+def _urls(result):
+    """URLs expandidas (no t.co), también las de tweets largos (note_tweet)."""
+    entities = result["legacy"].get("entities") or {}
+    note = (((result.get("note_tweet") or {}).get("note_tweet_results") or {})
+            .get("result") or {}).get("entity_set") or {}
+    return _dedup(u.get("expanded_url") or u.get("url")
+                  for u in (entities.get("urls") or []) + (note.get("urls") or []))
+
+def _best_variant(video_info):
+    mp4 = [v for v in (video_info or {}).get("variants") or []
+           if v.get("content_type") == "video/mp4"]
+    return max(mp4, key=lambda v: v.get("bitrate") or 0)["url"] if mp4 else None
+
+def _media(legacy):
+    ext = legacy.get("extended_entities") or legacy.get("entities") or {}
+    out = []
+    for m in ext.get("media") or []:
+        kind = m.get("type") or "photo"
+        url = m.get("media_url_https")
+        if kind in ("video", "animated_gif"):
+            url = _best_variant(m.get("video_info")) or url
+        if url:
+            out.append({"type": kind, "url": url})
+    return out
+
+def tweet_to_row(result):
+    """Convierte un objeto Tweet de GraphQL en una fila; None si no aplica."""
+    result = _unwrap(result)
+    if result is None:
+        return None
+    legacy = result["legacy"]
+    tweet_id = result.get("rest_id") or legacy.get("id_str")
+    screen_name, name = _user(result)
+    permalink = None
+    if tweet_id and screen_name:
+        permalink = f"https://x.com/{screen_name}/status/{tweet_id}"
+    return {
+        "display_name": name,
+        "handle": "@" + screen_name if screen_name else "",
+        "text": _full_text(result),
+        "timestamp": twitter_ts_to_iso(legacy.get("created_at")),
+        "permalink": permalink,
+        "replies": _to_int(legacy.get("reply_count")),
+        "retweets": _to_int(legacy.get("retweet_count")),
+        "likes": _to_int(legacy.get("favorite_count")),
+        "quotes": _to_int(legacy.get("quote_count")),
+        # sin views.count (tweets viejos, vistas ocultas) = desconocido, no 0:
+        # x_store solo conserva el valor previo si llega NULL
+        "views": _int_or_none((result.get("views") or {}).get("count")),
+        "tweet_id": tweet_id,
+        "in_reply_to_id": legacy.get("in_reply_to_status_id_str"),
+        "quoted_id": legacy.get("quoted_status_id_str"),
+        "urls": _urls(result),
+        "media": _media(legacy),
+        "reply_to": (["@" + legacy["in_reply_to_screen_name"]]
+                     if legacy.get("in_reply_to_screen_name") else []),
+    }
+
+def _entry_tweets(entry):
+    content = entry.get("content") or {}
+    # Entrada simple (TimelineTimelineItem)
+    item = content.get("itemContent")
+    if item:
+        yield (item.get("tweet_results") or {}).get("result")
+    # Módulos (conversaciones agrupadas)
+    for it in content.get("items") or []:
+        item = (it.get("item") or {}).get("itemContent") or {}
+        yield (item.get("tweet_results") or {}).get("result")
+
+def _entry_cursor(entry):
+    content = entry.get("content") or {}
+    # SearchTimeline pone el cursor en content; TweetDetail, en itemContent
+    for c in (content, content.get("itemContent") or {}):
+        if c.get("cursorType") == "Bottom":
+            return c.get("value")
+    return None
+
+def _instructions(payload):
+    timeline = (((((payload or {}).get("data") or {})
+                  .get("search_by_raw_query") or {})
+                 .get("search_timeline") or {})
+                .get("timeline") or {})
+    return timeline.get("instructions") or []
+
+def _parse_instructions(instructions):
+    rows, cursor = [], None
+    for ins in instructions:
+        entries = ins.get("entries") or []
+        if ins.get("entry"):  # TimelineReplaceEntry (cursores en páginas siguientes)
+            entries = entries + [ins["entry"]]
+        for entry in entries:
+            c = _entry_cursor(entry)
+            if c:
+                cursor = c
+                continue
+            for result in _entry_tweets(entry):
+                row = tweet_to_row(result)
+                if row is not None:
+                    rows.append(row)
+    return rows, cursor
+
+def response_errors(payload):
+    """Mensajes del arreglo `errors` de una respuesta GraphQL (X responde 200
+    con errores y sin timeline cuando está sobrecargado o limita)."""
+    errors = payload.get("errors") if isinstance(payload, dict) else None
+    return [e.get("message") or "" for e in errors or [] if isinstance(e, dict)]
+
+def parse_search_timeline(payload):
+    """Devuelve (filas, cursor_inferior) de una respuesta SearchTimeline.
+
+    El cursor es None cuando la página no trae uno nuevo."""
+    return _parse_instructions(_instructions(payload))
+
+def parse_tweet_detail(payload):
+    """Filas de una respuesta TweetDetail (tweet principal y respuestas
+    visibles), con la misma firma (filas, cursor) que parse_search_timeline."""
+    conv = (((payload or {}).get("data") or {})
+            .get("threaded_conversation_with_injections_v2") or {})
+    return _parse_instructions(conv.get("instructions") or [])